@@ -29,3 +29,15 @@ ANIMATION_LENGTH_SECONDS = 0.15  # Speed of a 'step' involving sprites moving be
 ANIMATION_LENGTH = int(ANIMATION_LENGTH_SECONDS * 1000)
 
 WORLD_NAME = "stage_test"
+# Worlds and their basemaps are loaded when first played. The least recently played ones are forgotten when there are
+# more than this many, or they take up more than this many bytes.
+WORLD_CACHE_SIZE = 3
+WORLD_CACHE_BYTES = 64 << 20
+BASEMAP_CACHE_SIZE = 3
+BASEMAP_CACHE_BYTES = 128 << 20
+
+UNDO_STEPS = 100  # Number of steps that can be taken back
+SHOW_DANGER = False  # Tint the tiles that will be deadly after the next step
+
+SAVE_REPLAYS = False  # Save a replay of every game to REPLAY_DIR when the player dies, for bug reports
+REPLAY_DIR = "replays"
@@ -0,0 +1,103 @@
+"""Least recently used cache, for things like worlds and basemaps that are only needed while they're being played.
+
+    worlds = LRUCache(parse_entities, capacity=3, budget=64 << 20, size_of=get_world_size)
+    world = worlds["stage_test"]  # Loaded the first time it's asked for
+
+The cache keeps at most capacity things, and evicts the least recently used ones while their total size is over
+budget. Whatever was used last is always kept, however big it is.
+"""
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Iterator, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Mapping that loads missing keys with load, and forgets the least recently used ones"""
+
+    def __init__(
+        self,
+        load: Callable[[K], V],
+        capacity: int,
+        budget: Optional[int] = None,
+        size_of: Callable[[V], int] = lambda value: 0,
+        name: str = "cache",
+    ) -> None:
+        assert capacity >= 1, "The cache must be able to hold something"
+        self.load = load
+        self.capacity = capacity
+        # Bytes, or None for no limit.
+        self.budget = budget
+        self.size_of = size_of
+        self.name = name
+        self.entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __getitem__(self, key: K) -> V:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        value = self.load(key)
+        self[key] = value
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self.pop(key)
+        size = self.size_of(value)
+        self.entries[key] = value, size
+        self.size += size
+        self._evict()
+
+    def pop(self, key: K) -> Optional[V]:
+        """Forget a key without counting it as an eviction, returns its value if it had one"""
+        if (entry := self.entries.pop(key, None)) is None:
+            return None
+        self.size -= entry[1]
+        return entry[0]
+
+    def _evict(self) -> None:
+        while len(self.entries) > 1 and (
+            len(self.entries) > self.capacity or (self.budget is not None and self.size > self.budget)
+        ):
+            key, (_, size) = self.entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            logging.debug(f"Evicted {key} ({size} bytes) from the {self.name}")
+
+    def clear(self) -> None:
+        """Forget everything. The counters are kept."""
+        self.entries.clear()
+        self.size = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.entries)
+
+    def keys(self) -> Iterator[K]:
+        return iter(self.entries)
+
+    def values(self) -> Iterator[V]:
+        """The cached values, least recently used first. Doesn't count as using them."""
+        return (value for value, _ in self.entries.values())
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        return ((key, value) for key, (value, _) in self.entries.items())
+
+    def stats(self) -> str:
+        return (
+            f"{self.name}: {len(self)}/{self.capacity} entries, {self.size >> 10} KiB, "
+            f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+        )
@@ -4,28 +4,63 @@ To add a new collision type, simply create a new collision object that subclasse
 CollisionRegistryBase, and it'll be added to the registry automatically."""
 from __future__ import annotations
 
-import random
-from typing import Type
+from typing import TYPE_CHECKING, Optional, Type
 
 from game.entity import Entity, Tags
+from game.entity_base import TagBit
 from game.helper import DOWN, LEFT, RIGHT, UP, Point
-from game.map import Map
+
+if TYPE_CHECKING:
+    from game.map import Map
 
 
 class CollisionRegistryBase:
     COLLISION_REGISTRY: dict[str, Type[CollisionRegistryBase]] = {}
+    # Which collision wins for a pair of tag masks. Priorities only depend on tags, so this is filled in lazily.
+    DISPATCH_TABLE: dict[tuple[int, int], Type[CollisionRegistryBase]] = {}
 
     def __init__(self, entity1: Entity, entity2: Entity):
         self.entities = entity1, entity2
 
+    @property
+    def world(self) -> Map:
+        """The map the collision is happening in"""
+        world = self.entities[0].map
+        assert world is not None, f"{self.entities[0]} isn't on a map"
+        return world
+
     @classmethod
     def __init_subclass__(cls, **kwargs):
         cls.COLLISION_REGISTRY[cls.__name__] = cls  # Add class to registry.
+        cls.DISPATCH_TABLE.clear()  # A new collision type could win any pair.
 
     @classmethod
     def get_registry(cls):
         return cls.COLLISION_REGISTRY
 
+    @classmethod
+    def get_collision_class(cls, entity1: Entity, entity2: Entity) -> Type[CollisionRegistryBase]:
+        """Get the highest priority collision type for a pair of entities.
+
+        Looked up by the entities' current tags, so changing an entity's tags can't return a stale collision type.
+        """
+        key = entity1.tags.mask, entity2.tags.mask
+        if (collision_class := cls.DISPATCH_TABLE.get(key)) is None:
+            collision_class = cls._find_collision_class(entity1, entity2)
+            cls.DISPATCH_TABLE[key] = collision_class
+        return collision_class
+
+    @classmethod
+    def _find_collision_class(cls, entity1: Entity, entity2: Entity) -> Type[CollisionRegistryBase]:
+        """Ask every collision type for its priority. The first one registered wins a tie."""
+        highest: Optional[CollisionRegistryBase] = None
+        for collision_class in cls.COLLISION_REGISTRY.values():
+            collision_instance = collision_class(entity1, entity2)
+            if not highest or collision_instance.get_priority() > highest.get_priority():
+                highest = collision_instance
+        assert highest, "No collision types registered."
+        return type(highest)
+
     def get_priority(self, *args, **kwargs) -> int:
         """Get the priority of this collision rule. Returns 0 if not applicable."""
         raise NotImplementedError()
@@ -40,6 +75,7 @@ class KillCollision(CollisionRegistryBase):
         super().__init__(a, b)
 
         p = 0
+        self.marked_frog: Optional[Entity] = None
         if Tags.player in a and Tags.kills_player in b:
             self.marked_frog = a
             p = 1
@@ -47,7 +83,7 @@ class KillCollision(CollisionRegistryBase):
             self.marked_frog = b
             p = 1
         elif Tags.hops in b and Tags.hops in a:
-            self.marked_frog = random.choice(self.entities)
+            # The frog is chosen when resolved, so just asking for the priority doesn't use up random numbers.
             p = 5
         self.priority = p
 
@@ -55,8 +91,10 @@ class KillCollision(CollisionRegistryBase):
         return self.priority
 
     def resolve_collision(self, **kwargs):
+        if self.marked_frog is None:
+            self.marked_frog = self.world.rng.choice(self.entities)
         self.marked_frog.alive = False
-        Map.world.cull_entities()
+        self.world.remove_entity(self.marked_frog)
 
 
 class PushCollision(CollisionRegistryBase):
@@ -81,18 +119,36 @@ class PushCollision(CollisionRegistryBase):
 
     @classmethod
     def get_pushable_line(cls, pushable, direction, pushables):
+        """Find what would be pushed along with pushable, adding it to pushables.
+
+        Returns whatever is blocking the line of pushables, or False if nothing is.
+        The edge of the map blocks a line like a wall would, then the last pushable in the line is returned."""
+        pushables = pushables or []
+        world = pushable.map
+        # Skip to the end of the line using the map's bitboards.
+        if length := world.get_push_line_length(pushable.position, direction):
+            start = pushable.position
+            for distance in range(1, length + 1):
+                pushables.extend(e for e in world.tiles[start + direction * distance] if e.tags.mask & TagBit.pushable)
+            pushable = pushables[-1]
+        return cls._walk_pushable_line(pushable, direction, pushables)
+
+    @classmethod
+    def _walk_pushable_line(cls, pushable, direction, pushables):
         recurse = False
         new_pos = pushable.position + direction
+        if not pushable.map.is_in_map(new_pos):
+            return pushable
         # There may be multiple things to push on this tile
         pushables = pushables or []
-        for entity in Map.world[new_pos]:
-            if Tags.solid in entity.tags or Tags.pusher in entity.tags:
+        for entity in pushable.map.tiles.get(new_pos, ()):
+            if entity.tags.mask & (TagBit.solid | TagBit.pusher):
                 return entity
-            elif Tags.pushable in entity.tags:
+            elif entity.tags.mask & TagBit.pushable:
                 recurse = True
                 pushables.append(entity)
         if recurse:
-            return cls.get_pushable_line(pushables[-1], direction, pushables)
+            return cls._walk_pushable_line(pushables[-1], direction, pushables)
         return False
 
     @classmethod
@@ -117,3 +173,5 @@ class PushCollision(CollisionRegistryBase):
         success = self.push(self.pushable, direction)
         if not success:
             self.pusher.position = self.pusher.position_history[-1]
+            # The pusher bounced off.
+            self.world.trajectories_changed()
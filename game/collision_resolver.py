@@ -4,37 +4,35 @@ The only function that should be needed elsewhere is resolve_collisions.
 """
 import itertools
 import logging
-from collections import Counter
 from typing import Iterable, Optional, Type
 
 from game.collision_registry import CollisionRegistryBase
 from game.entity import Entity
-from game.helper import IndentedLogging, Point, c
+from game.helper import Point, c
 from game.map import Map
+from game.tracing import Tracer
 
 
-def get_collision_for_pair(log, pair) -> CollisionRegistryBase:
-    """Get the highest priority collision type for an entity pair"""
-    highest: Optional[CollisionRegistryBase] = None
-
-    # Iterate over every collision type
-    for collision_name in CollisionRegistryBase.COLLISION_REGISTRY:
-
-        # Get a handle to the collision class, and create an instance of it
-        collision_class: Type[CollisionRegistryBase] = CollisionRegistryBase.COLLISION_REGISTRY[collision_name]
-        collision_instance: CollisionRegistryBase = collision_class(*pair)
+class NoCollision(AssertionError):
+    """Entities share a tile, but none of the registered collision types applies to them"""
 
-        if not highest or collision_instance.get_priority() > highest.get_priority():
-            highest = collision_instance
 
-    assert highest and highest.get_priority(), f"No applicable collision for pair: {pair[0]} and {pair[1]}."
-    log(f"Found {type(highest).__name__} for {', '.join(str(x) for x in pair)}. Priority={highest.get_priority()}")
+def get_collision_for_pair(log, pair) -> CollisionRegistryBase:
+    """Get the highest priority collision type for an entity pair"""
+    collision_class: Type[CollisionRegistryBase] = CollisionRegistryBase.get_collision_class(*pair)
+    highest = collision_class(*pair)
+
+    if not highest.get_priority():
+        raise NoCollision(f"No applicable collision for pair: {pair[0]} and {pair[1]}.")
+    log(
+        lambda: f"Found {type(highest).__name__} for {', '.join(str(x) for x in pair)}. Priority={highest.get_priority()}"
+    )
     return highest
 
 
-def get_collision_for_tile(log, point: Point) -> CollisionRegistryBase:
+def get_collision_for_tile(log, world: Map, point: Point) -> CollisionRegistryBase:
     """Get the highest priority collision type for a point in the world"""
-    entities_here: list[Entity] = Map.world[point]
+    entities_here: list[Entity] = world[point]
     # Form a list containing all unique pairs of entities
     pairs: Iterable[tuple[Entity, Entity]] = itertools.combinations(entities_here, 2)
     highest: Optional[CollisionRegistryBase] = None
@@ -44,66 +42,65 @@ def get_collision_for_tile(log, point: Point) -> CollisionRegistryBase:
         if not highest or collision_instance.get_priority() > highest.get_priority():
             highest = collision_instance
 
-    assert highest and highest.get_priority(), f"No applicable collision at {Point} with entities: {entities_here}"
-    log(c(f"Chose {type(highest).__name__} for ", fg="g") + ", ".join(str(x) for x in highest.entities) + ".")
+    if not highest or not highest.get_priority():
+        raise NoCollision(f"No applicable collision at {point} with entities: {entities_here}")
+    log(lambda: c(f"Chose {type(highest).__name__} for ", fg="g") + ", ".join(str(x) for x in highest.entities) + ".")
     return highest
 
 
 find_collision = get_collision_for_tile
 
 
-def resolve_highest_priority_collision(log, point):
-    collision_instance = find_collision(log, point)
-    try:
-        collision_instance.resolve_collision()
-    except NotImplementedError as e:
-        msg = f"{type(collision_instance).__name__} is not implemented"
-        msg += f": {e}" if len(str(e)) else ""
-        log(c(f"{msg}.", fg="r"))
-
+def resolve_highest_priority_collision(log: Tracer, world: Map, point):
+    with log.indented():
+        collision_instance = find_collision(log, world, point)
+        try:
+            collision_instance.resolve_collision()
+        except NotImplementedError as e:
+            msg = f"{type(collision_instance).__name__} is not implemented"
+            msg += f": {e}" if len(str(e)) else ""
+            log(c(f"{msg}.", fg="r"))
 
-def get_points_to_check_for_collisions():
-    points = [entity.position for entity in Map.world.entities if entity.alive]
-    counts = Counter(points)
-    # No need to check collisions on a point with just one entity.
-    # Convert to set to remove duplicates.
-    points = {p for p in points if counts[p] > 1}
-    return sorted(list(points))
 
+def get_points_to_check_for_collisions(world: Map, worklist: set[Point]) -> list[Point]:
+    # Only tiles that still hold more than one living entity need a collision.
+    points = {p for p in worklist if p in world.crowded and sum(e.alive for e in world.tiles[p]) > 1}
+    return sorted(points)
 
-def resolve_highest_priority_collisions(log):
-    """Resolve the highest priority collision at each point.
 
-    Returns True if something happened"""
-    points_to_check = get_points_to_check_for_collisions()
-    if not points_to_check:
-        return True
-    for point in points_to_check:
-        entities = [e for e in Map.world[point] if e.alive]
-        log(f"{point} contains {entities}")
-        resolve_highest_priority_collision(log, point)
-    return False
+def resolve_highest_priority_collisions(log: Tracer, world: Map, points_to_check: list[Point]) -> None:
+    """Resolve the highest priority collision at each point."""
+    with log.indented():
+        for point in points_to_check:
+            if log.enabled:
+                log(f"{point} contains {[e for e in world[point] if e.alive]}")
+            resolve_highest_priority_collision(log, world, point)
 
 
-def resolve_collisions():
-    """Resolve all collisions in the current world. Gives up after 13 iterations.
+def resolve_collisions(world: Map) -> int:
+    """Resolve all collisions in a world, returns how many rounds it took.
 
-    An iteration involves a registered collision resolution taken at every coordinate containing at-least two entities.
-    To prevent infinite loops and to assist debugging, this function logs with errors after 10 iterations before
-    giving up entirely at 13 iterations.
+    A round resolves the highest priority collision on every tile in the worklist, in order. The first worklist is
+    the crowded tiles, i.e. the ones entered this step plus any left unsettled by the last one. After that it's the
+    tiles entered during the last round (e.g. the destination of a push or a bounced pusher) and the tiles that are
+    still crowded after it. Stops once nothing is left, or if the world comes back round to a state it has already
+    been in, as it would then go round in circles forever.
     """
-    collisions_settled = False
-    log = IndentedLogging(logging.info)
+    log = Tracer(logging.INFO)
     log("Settling collisions")
-    for _ in range(10):
-        collisions_settled |= resolve_highest_priority_collisions(log)
-        if collisions_settled:
-            log("Collisions settled.")
-            return
-        log("Collisions not settled, checking again..")
-
-    logging.error("Collisions didn't finish settling! Trying 3 more times...")
-    log = IndentedLogging(logging.error)
-    for i in range(3):
-        log(f"Iteration {i}")
-        resolve_highest_priority_collisions(log=log)
+    worklist = set(world.crowded)
+    seen = {world.hash}
+    rounds = 0
+    while points := get_points_to_check_for_collisions(world, worklist):
+        rounds += 1
+        world.entered.clear()
+        resolve_highest_priority_collisions(log, world, points)
+        worklist = world.entered | {p for p in points if p in world.crowded}
+        if world.hash in seen:
+            logging.error(f"Collisions can't settle, giving up on {sorted(worklist)} after {rounds} rounds.")
+            return rounds
+        seen.add(world.hash)
+        if worklist:
+            log("Collisions not settled, checking again..")
+    log(f"Collisions settled in {rounds} rounds.")
+    return rounds
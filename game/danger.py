@@ -0,0 +1,69 @@
+"""Predict which tiles will be deadly over the next few steps.
+
+A tile is deadly if something that kills the player, or hops (hop-vs-hop collisions kill one of the two), will be on
+it. Where each creature will be is worked out from its species' state machine (game.state_machine), so the world
+isn't touched. Solids are static, so creatures bouncing off them is predicted too.
+
+Pushes and kills are not predicted. Instead the map bumps Map.trajectory_version when one changes where a creature
+is heading, and the prediction is redone the next time it's asked for:
+
+    danger = DangerMap(game.map)
+    if danger.is_deadly(game.get_player_pos() + UP):
+        ...
+"""
+from __future__ import annotations
+
+from game.entity_base import Tags
+from game.helper import Point
+from game.map import Map
+from game.state_machine import compile_species
+
+DANGER_TAGS = Tags.kills_player, Tags.hops
+
+
+class DangerMap:
+    """Timeline of deadly tiles for the next horizon steps of a world"""
+
+    def __init__(self, world: Map, horizon: int = 16) -> None:
+        self.world = world
+        self.horizon = horizon
+        # timeline[t] is the deadly tiles t steps after computed_at.
+        self.timeline: list[frozenset[Point]] = []
+        self.computed_at = 0
+        self.version = -1
+
+    def refresh(self) -> None:
+        """Predict the next horizon steps from the world as it is now"""
+        world = self.world
+        solid = {point for point, tile in world.tiles.items() if any(Tags.solid in e.tags for e in tile)}
+        tiles: list[set[Point]] = [set() for _ in range(self.horizon + 1)]
+        for entity in world:
+            if entity is world.player or not any(tag in entity.tags for tag in DANGER_TAGS):
+                continue
+            machine = compile_species(type(entity))
+            position, state = entity.position, entity.state
+            for steps in range(self.horizon + 1):
+                tiles[steps].add(position)
+                if machine is None or state not in machine.transitions:
+                    # Can't be predicted, assume it stays where it is.
+                    continue
+                move, state = machine.move(state)
+                # Same as Map.update_creatures, creatures moving onto a solid stay put.
+                if position + move not in solid:
+                    position += move
+        self.timeline = [frozenset(t) for t in tiles]
+        self.computed_at = world.steps_taken
+        self.version = world.trajectory_version
+
+    def deadly_tiles(self, steps: int = 1) -> frozenset[Point]:
+        """Tiles that will be deadly after a number of steps from now. Deadly now is 0."""
+        assert 0 <= steps <= self.horizon, f"Can only see {self.horizon} steps ahead"
+        index = self.world.steps_taken - self.computed_at + steps
+        if self.version != self.world.trajectory_version or not 0 <= index <= self.horizon:
+            self.refresh()
+            index = steps
+        return self.timeline[index]
+
+    def is_deadly(self, point: Point, steps: int = 1) -> bool:
+        """Whether a tile will be deadly after a number of steps from now"""
+        return point in self.deadly_tiles(steps)
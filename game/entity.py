@@ -8,7 +8,6 @@ import math
 
 from game.entity_base import Entity, Facing, Tags
 from game.helper import DOWN, IDLE, LEFT, RIGHT, UP, Point
-from game.map import Map
 
 
 class InvalidState(Exception):
@@ -37,6 +36,7 @@ class SlidingStone(IdleIvan):
 class Player(Entity):
     """Player"""
 
+    __slots__ = ("move_queue", "max_steps", "steps_left")
     default_tags = [Tags.player]
 
     def __init__(self, *args, **kwargs):
@@ -45,6 +45,19 @@ class Player(Entity):
         self.max_steps: int = 50
         self.steps_left: int = self.max_steps
 
+    def get_snapshot(self) -> tuple:
+        return super().get_snapshot(), self.steps_left
+
+    def set_snapshot(self, snapshot: tuple) -> None:
+        snapshot, self.steps_left = snapshot
+        super().set_snapshot(snapshot)
+        self.move_queue = []
+
+    def __copy__(self) -> Player:
+        clone = super().__copy__()
+        clone.move_queue = list(self.move_queue)
+        return clone
+
     @property
     def facing(self) -> Facing:
         if not self.position_history:
@@ -148,7 +161,7 @@ class BarrelingBarrel(Entity):
             case _:
                 raise InvalidState
         dest = self.position + direction
-        if not Map.world.is_in_map(dest):
+        if self.map is not None and not self.map.is_in_map(dest):
             return IDLE, 0
         # if any(entity for entity in entity_list if entity.position == dest):
         #    return IDLE, 0
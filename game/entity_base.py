@@ -2,25 +2,119 @@ from __future__ import annotations
 
 import math
 import random
-from enum import Enum
-from typing import Optional, Type
+from enum import Enum, IntFlag, auto
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Type, TypeVar, Union
 
 from game.helper import Point, c
 
+if TYPE_CHECKING:
+    from game.map import Map
+
 # TODO: Make this an entity class attribute?
 SPECIES: dict[str, Type[Entity]] = {}
+E = TypeVar("E", bound="Entity")
+
+
+@lru_cache(maxsize=None)
+def get_name_colour(name: str) -> str:
+    """Pick a colour for a name, the same one every time."""
+    # Todo: implement random colours better than keyboard spam
+    return random.Random(name).choice("krgybmcw")
+
+
+class Tags(IntFlag):
+    solid = auto()
+    hops = auto()
+    player = auto()
+    pushable = auto()
+    pusher = auto()
+    kills_player = auto()
+    barrel = auto()
+    no_animation = auto()
+    random_sprite = auto()
+
+
+class TagBit:
+    """The bits of Tags as plain ints. Operators on IntFlag members run in Python and are slow, so hot paths check
+    entity.tags.mask against these instead."""
+
+    solid = Tags.solid._value_
+    hops = Tags.hops._value_
+    player = Tags.player._value_
+    pushable = Tags.pushable._value_
+    pusher = Tags.pusher._value_
+    kills_player = Tags.kills_player._value_
+    barrel = Tags.barrel._value_
+    no_animation = Tags.no_animation._value_
+    random_sprite = Tags.random_sprite._value_
+
+
+# Map files name their tags.
+TagLike = Union[Tags, str]
+
+
+def get_tag_bit(tag: TagLike) -> int:
+    """The bit of a tag, given the tag or its name. Unknown names are 0."""
+    if isinstance(tag, str):
+        return Tags[tag]._value_ if tag in Tags.__members__ else 0
+    return tag._value_
+
+
+class TagSet:
+    """An entity's tags, stored as a bitmask of Tags.
+
+    Works like the list of tags it replaces: tags can be checked for, added, removed and iterated over, as members of
+    Tags or by name. Checking for a member of Tags is a single AND.
+    """
+
+    __slots__ = ("mask",)
+
+    def __init__(self, tags: Iterable[TagLike] = ()) -> None:
+        self.mask = 0
+        self.extend(tags)
+
+    def __contains__(self, tag: TagLike) -> bool:
+        try:
+            return self.mask & tag._value_ != 0  # type: ignore[union-attr]
+        except AttributeError:
+            return self.mask & get_tag_bit(tag) != 0
+
+    def append(self, tag: TagLike) -> None:
+        if not (bit := get_tag_bit(tag)):
+            raise ValueError(f"Unknown tag: {tag}")
+        self.mask |= bit
+
+    def extend(self, tags: Iterable[TagLike]) -> None:
+        for tag in tags:
+            self.append(tag)
+
+    def remove(self, tag: TagLike) -> None:
+        if tag not in self:
+            raise ValueError(f"{tag} not in tags")
+        self.mask &= ~get_tag_bit(tag)
 
+    def copy(self) -> TagSet:
+        clone = TagSet()
+        clone.mask = self.mask
+        return clone
 
-class Tags(str, Enum):
-    solid = "solid"
-    hops = "hops"
-    player = "player"
-    pushable = "pushable"
-    pusher = "pusher"
-    kills_player = "kills_player"
-    barrel = "barrel"
-    no_animation = "no_animation"
-    random_sprite = "random_sprite"
+    def __iter__(self) -> Iterator[Tags]:
+        return (tag for tag in Tags if self.mask & tag._value_)
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TagSet):
+            return self.mask == other.mask
+        try:
+            return self.mask == TagSet(other).mask
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr([tag.name for tag in self])
 
 
 class Facing(int, Enum):
@@ -30,16 +124,31 @@ class Facing(int, Enum):
     LEFT = 3
 
 
-class Entity:
+@lru_cache(maxsize=None)
+def get_slots(cls: type) -> tuple[str, ...]:
+    """Every slot an entity class has, including those of its bases"""
+    return tuple(name for klass in cls.__mro__ for name in getattr(klass, "__slots__", ()))
+
+
+class EntityMeta(type):
+    """Gives every species empty __slots__ unless it declares its own, so no entity carries a __dict__."""
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        namespace.setdefault("__slots__", ())
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+
+class Entity(metaclass=EntityMeta):
     """Thing on the map that is not part of the background"""
 
+    __slots__ = ("name", "map", "uid", "_position", "tags", "_state", "_facing", "alive", "position_history")
     default_tags: list[Tags] = []
 
     def __init__(
         self,
         name: Optional[str] = None,
         position: Optional[Point] = None,
-        tags: Optional[list[Tags]] = None,
+        tags: Optional[Iterable[TagLike]] = None,
         state: int = 0,
         facing: Facing = Facing.UP,
     ):
@@ -50,14 +159,62 @@ class Entity:
         """
         # TODO: Is name really needed? Use Property, or better yet a clever dunder __eq__?
         self.name: str = name or type(self).__name__
-        self.position: Point = position or Point(-1, -1)
-        self.tags: list[Tags] = tags or []
+        # The map this entity lives in. Set by the map so it can keep its spatial index up to date.
+        self.map: Optional[Map] = None
+        # Order of the entity in its world, assigned by the map the first time it's added.
+        self.uid: Optional[int] = None
+        self._position: Point = position or Point(-1, -1)
+        self.tags = TagSet(tags or ())
         self.tags.extend(self.default_tags)
-        self.state: int = state
+        self._state: int = state
         self._facing: Facing = facing
         self.alive: bool = True
         self.position_history: list[Point] = []
 
+    @property
+    def position(self) -> Point:
+        return self._position
+
+    @position.setter
+    def position(self, new_position: Point) -> None:
+        old_position = self._position
+        self._position = new_position
+        if self.map is not None:
+            self.map.move_entity(self, old_position, new_position)
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    @state.setter
+    def state(self, new_state: int) -> None:
+        old_state = self._state
+        self._state = new_state
+        if self.map is not None:
+            self.map.change_state(self, old_state, new_state)
+
+    def get_snapshot(self) -> tuple:
+        """Get a compact copy of everything about the entity that changes during play."""
+        last_position = self.position_history[-1] if self.position_history else None
+        return self.position, self.state, self.alive, last_position
+
+    def set_snapshot(self, snapshot: tuple) -> None:
+        """Return the entity to a snapshot taken with get_snapshot.
+
+        Only the last entry of position_history is kept, the rest isn't needed to play on."""
+        self.position, self.state, self.alive, last_position = snapshot
+        self.position_history = [] if last_position is None else [last_position]
+
+    def __copy__(self: E) -> E:
+        """Copy the entity, e.g. for a forked map. The copy has its own tags, and its own position_history of just the
+        last entry."""
+        clone = object.__new__(type(self))
+        for name in get_slots(type(self)):
+            setattr(clone, name, getattr(self, name))
+        clone.tags = self.tags.copy()
+        clone.position_history = self.position_history[-1:]
+        return clone
+
     def _get_move(self, **kwargs) -> tuple[Point, int]:
         """Entities movement pattern.
         Get the next position object wants to move in, and the resulting state"""
@@ -84,16 +241,15 @@ class Entity:
             self._facing = [Facing.DOWN, Facing.LEFT, Facing.UP, Facing.RIGHT][compass_lookup % 4]
         return self._facing
 
-    def __contains__(self, tag):
-        return tag in self.tags
+    def __contains__(self, tag: TagLike) -> bool:
+        # Same as TagSet.__contains__, inlined as this is checked so often.
+        try:
+            return self.tags.mask & tag._value_ != 0  # type: ignore[union-attr]
+        except AttributeError:
+            return tag in self.tags
 
     def __repr__(self) -> str:
-        try:
-            random.seed(self.name)
-            # Todo: implement random colours better than keyboard spam
-            return c(self.name, fg=random.choice("krgybmcw"))
-        finally:
-            random.seed()
+        return c(self.name, fg=get_name_colour(self.name))
 
     __str__ = __repr__
 
@@ -1,28 +1,70 @@
 """Module for maintaining game state and managing game interface.
 
-Managing interface includes determining valid game inputs and querying the game state."""
+Managing interface includes determining valid game inputs and querying the game state.
+Nothing here depends on pygame, so a Game can be run headless (bots, tests, batch jobs):
+
+    game = Game(parse_entities("stage_test"))
+    game.move(UP)
+
+A game owns its worlds and nothing is shared between games, so any number can be played at once, e.g. in threads.
+"""
+from collections import deque
+from typing import Optional
 
 from game import collision_registry
+from game.cache import LRUCache
 from game.collision_resolver import resolve_collisions
 from game.entity_base import Entity, Tags
 from game.helper import Point
-from game.map import Map
-from gui.map_parser import parse_entities
+from game.map import Map, MapTemplate, StepDelta
+from game.world_loader import parse_entities
+from GAME_CONSTANTS import UNDO_STEPS, WORLD_CACHE_BYTES, WORLD_CACHE_SIZE, WORLD_NAME
+
+# Rough memory use of an entity, including its share of the map's indexes. Measured with tracemalloc.
+ENTITY_BYTES = 1024
+
+
+def get_world_size(world: Map) -> int:
+    """Estimate how much memory a world takes up, in bytes"""
+    return world.count_entities() * ENTITY_BYTES
 
 
 class Game:
-    def __init__(self) -> None:
-        """Initialises the game"""
-        self.reset_game()
+    def __init__(self, world: Optional[Map] = None, template: Optional[MapTemplate] = None) -> None:
+        """Initialises the game
+
+        Args:
+            world: An already loaded world to play in. If not given, the worlds are loaded from file.
+            template: How world started, to restart it from. Taken from world if not given.
+        """
+        # Ring buffer of (steps left, changes) for each step taken, newest last.
+        self.undo_history: deque[tuple[int, StepDelta]] = deque(maxlen=UNDO_STEPS)
+        # Every action taken in the current world since it was loaded, for replays. None is an undo.
+        self.recording: Optional[list[Optional[Point]]] = []
+        # Worlds are loaded when they're first played, see map.
+        self.worlds: LRUCache[str, Map] = LRUCache(
+            self._load_world, WORLD_CACHE_SIZE, WORLD_CACHE_BYTES, get_world_size, name="world cache"
+        )
+        # How each loaded world started, to start it over without reading the world file again.
+        self.templates: dict[str, MapTemplate] = {}
+        self.current_world_name: str = WORLD_NAME
+        if world is not None:
+            self.templates[world.map_name] = world.make_template() if template is None else template
+            self.worlds[world.map_name] = world
+            self.current_world_name = world.map_name
         # ToDo: Load a player save file for any persistent items/preferences
 
     @property
-    def map(self):
-        return Map.world
+    def map(self) -> Map:
+        """The world being played, loaded if it isn't already"""
+        return self.worlds[self.current_world_name]
 
-    @property
-    def worlds(self):
-        return Map.worlds
+    def _load_world(self, world_name: str) -> Map:
+        world = parse_entities(world_name)
+        # Forget the templates of worlds that have been evicted.
+        self.templates = {name: template for name, template in self.templates.items() if name in self.worlds}
+        self.templates[world_name] = world.make_template()
+        return world
 
     @property
     def entities(self):
@@ -36,10 +78,18 @@ class Game:
         for e in self.entities:
             e.alive = False
 
-    @staticmethod
-    def force_change_world(world: str):
-        Map.current_world_name = world
-        Map.world.reset()
+    def force_change_world(self, world: str):
+        """Go to a world, which starts over from how it was loaded"""
+        self.current_world_name = world
+        self.restart()
+
+    def restart(self) -> None:
+        """Start the current world over from how it was loaded. No files are read, it's reset from its template."""
+        if self.current_world_name in self.worlds:
+            self.map.reset(self.templates[self.current_world_name])
+        self.undo_history.clear()
+        if self.recording is not None:
+            self.recording.clear()
 
     def player_alive(self) -> bool:
         return self.player.alive
@@ -60,10 +110,13 @@ class Game:
         """returns number of steps remaining"""
         return self.player.max_steps
 
-    @staticmethod
-    def reset_game():
-        for world in Map.worlds:
-            parse_entities(world)
+    def reset_game(self):
+        """Start every loaded world over"""
+        for world_name, world in self.worlds.items():
+            world.reset(self.templates[world_name])
+        self.undo_history.clear()
+        if self.recording is not None:
+            self.recording.clear()
 
     def move(self, direction: Point) -> bool:
         """Read a move and if valid, perform it and update the game.
@@ -83,13 +136,33 @@ class Game:
         if self._is_move_invalid(new_pos, direction):
             return False
 
+        if self.recording is not None:
+            self.recording.append(direction)
+
         # Set the player's next move
         self.player.move_queue = [direction]
+        steps_left = self.player.steps_left
 
         # Update all creatures (including player!)
-        self.map.update_creatures()
-        resolve_collisions()
-        self.map.cull_entities()
+        self.map.start_journal()
+        try:
+            self.map.update_creatures()
+            resolve_collisions(self.map)
+        finally:
+            # Also when the step fails part way, so no tombstones are left behind for undo to duplicate.
+            self.map.cull_entities()
+            self.undo_history.append((steps_left, self.map.stop_journal()))
+        return True
+
+    def undo(self) -> bool:
+        """Take back the last step, returns True if there was a step to undo."""
+        if not self.undo_history:
+            return False
+        steps_left, delta = self.undo_history.pop()
+        self.map.undo(delta)
+        self.player.steps_left = steps_left
+        if self.recording is not None:
+            self.recording.append(None)
         return True
 
     def _is_move_invalid(self, new_pos: Point, direction: Point) -> bool:
@@ -105,9 +178,7 @@ class Game:
         # TODO: What about when pushing an object into a spot where another object is due to appear?
         in_line: list[Entity] = []
         if blocked := collision_registry.PushCollision.get_pushable_line(self.player, direction, in_line):
-            if blocked.position != new_pos or Tags.solid in blocked.tags:
+            # Pushables only block at the edge of the map.
+            if blocked.position != new_pos or Tags.solid in blocked.tags or Tags.pushable in blocked.tags:
                 return True
         return False
-
-
-parse_entities("stage_test")
@@ -1,41 +1,69 @@
 """Various helper functions"""
 from __future__ import annotations
 
-import traceback
+import logging
+import sys
 from typing import NamedTuple, Optional
 
 
 class Point(NamedTuple):
-    """Used for storing vectors and adding them together."""
+    """Used for storing vectors and adding them together.
+
+    Adding, subtracting and multiplying Points gives interned Points where it can, see get_point."""
 
     x: int
     y: int
 
     def __add__(self, other: Point | tuple) -> Point:
-        if isinstance(other, Point):
-            return Point(self.x + other[0], self.y + other[1])
-        return NotImplemented
+        try:
+            return get_point(self[0] + other[0], self[1] + other[1])
+        except (TypeError, IndexError):
+            return NotImplemented
 
     def __sub__(self, other: Point | tuple) -> Point:
-        if isinstance(other, Point):
-            return Point(self.x - other[0], self.y - other[1])
-        return NotImplemented
+        try:
+            return get_point(self[0] - other[0], self[1] - other[1])
+        except (TypeError, IndexError):
+            return NotImplemented
 
     def __mul__(self, other: int):  # type: ignore[override]
         """Multiply vector by a scalar"""
-        return Point(self.x * other, self.y * other)
+        return get_point(self[0] * other, self[1] * other)
 
     def __repr__(self):
         return f"({self.x}, {self.y})"
 
 
+# Points with both coordinates in this range are interned.
+INTERN_MIN, INTERN_MAX = -16, 256
+_INTERN_SPAN = INTERN_MAX - INTERN_MIN
+_interned: list[Optional[Point]] = [None] * _INTERN_SPAN**2
+# Skips the Python level __new__ NamedTuple makes, which is most of the cost of making a Point.
+_new_point = tuple.__new__
+
+
+def get_point(x: int, y: int) -> Point:
+    """Get the Point (x, y).
+
+    Small whole number Points are made once and then shared, so moving about and position histories don't keep
+    allocating new ones. Anything else (big maps, fractions while animating) gets a new Point.
+    """
+    if INTERN_MIN <= x < INTERN_MAX and INTERN_MIN <= y < INTERN_MAX and type(x) is int and type(y) is int:
+        i = (x - INTERN_MIN) * _INTERN_SPAN + y - INTERN_MIN
+        point = _interned[i]
+        if point is None:
+            point = _interned[i] = _new_point(Point, (x, y))
+        return point
+    return _new_point(Point, (x, y))
+
+
 # Movement vectors
 UP, LEFT, DOWN, RIGHT, IDLE = (
-    Point(0, -1),
-    Point(-1, 0),
-    Point(0, 1),
-    Point(1, 0),
-    Point(0, 0),
+    get_point(0, -1),
+    get_point(-1, 0),
+    get_point(0, 1),
+    get_point(1, 0),
+    get_point(0, 0),
 )
 
 
@@ -84,22 +112,9 @@ def c(fmt, fg=None, bg=None, style: Optional[list[str]] = None):
     return f"\x1b[{formatted_props}m{fmt}\x1b[0m"
 
 
-class IndentedLogging:
-    """Logging object that indents logs based on how many functions it is deep relative to the instantiation time."""
-
-    def __init__(self, level):
-        self.level = level
-        self.base_indent = len(traceback.extract_stack())
-        self.maximum_indent = 2
-        self.fg = None
-
-    def __call__(self, msg: str):
-        """Log."""
-        stack_delta = len(traceback.extract_stack()) - self.base_indent
-        prefix = "    " * min(stack_delta, self.maximum_indent)
-        self.level(c(prefix + msg, fg=self.fg))
-
-
-class classproperty(property):
-    def __get__(self, owner_self, owner_cls):
-        return self.fget(owner_cls)
+def report_to_stdout(report: logging.Logger) -> None:
+    """Send a command line tool's results to stdout, and turn the engine's own logging down to warnings."""
+    logging.root.setLevel(logging.WARNING)
+    report.setLevel(logging.INFO)
+    report.addHandler(logging.StreamHandler(sys.stdout))
+    report.propagate = False
@@ -0,0 +1,111 @@
+"""Step many games of the same world in lockstep, for bots.
+
+    games = LockstepGames("stage_test", 64)
+    observations = games.reset()
+    observations, done = games.step(actions)
+
+Actions are indices into MOVES. Observations are a (n, len(CHANNELS), height, width) array, one channel for each
+kind of thing that can be on a tile. Games that end are reset straight away, done says which ones did.
+
+The world file is only read once. Every game gets its own copy of the world, and is reset from the template
+taken when it was loaded.
+
+This is not a vectorized environment: step plays each game through Game.move in turn, so it's only as fast as the
+object engine (several thousand moves a second on stage_test). What it saves is reloading worlds and the
+bookkeeping of resets and observations.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Sequence
+
+import numpy as np
+
+from game.collision_resolver import NoCollision
+from game.entity_base import Entity, Tags
+from game.game import Game
+from game.helper import DOWN, LEFT, RIGHT, UP
+from game.map import Map
+from game.world_loader import build_entities, load_world_data
+
+MOVES = UP, DOWN, LEFT, RIGHT
+# Observation channels, a tile is set in a channel if something on it has the tag.
+CHANNELS = Tags.player, Tags.kills_player, Tags.pushable, Tags.solid
+
+
+class LockstepGames:
+    """n independent games of one world"""
+
+    def __init__(self, world_name: str, n: int, seed: int = 0) -> None:
+        world_data = load_world_data(world_name)
+        dims = world_data.dims
+        self.worlds: list[Map] = []
+        self.games: list[Game] = []
+        # Bitmask of the channels each entity is shown in.
+        self.channels: dict[Entity, int] = {}
+        for i in range(n):
+            entities = build_entities(world_data)
+            player = [e for e in entities if Tags.player in e][0]
+            world = Map(f"{world_name}[{i}]", entities, player, dims, seed=seed + i)
+            game = Game(world)
+            game.recording = None
+            self.worlds.append(world)
+            self.games.append(game)
+            for entity in entities:
+                self.channels[entity] = sum(1 << channel for channel, tag in enumerate(CHANNELS) if tag in entity)
+        self.seed = seed
+        self.episodes = [0] * n
+        self.observations = np.zeros((n, len(CHANNELS), dims.y, dims.x), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def reset(self) -> np.ndarray:
+        """Reset every game, returns the observations"""
+        for i in range(len(self)):
+            self._reset(i)
+        return self.observations.copy()
+
+    def _reset(self, i: int) -> None:
+        self.games[i].restart()
+        # A different, but reproducible, roll of the dice every episode. Masked to 64 bits, as hash() can be
+        # negative and replays store the seed unsigned.
+        self.episodes[i] += 1
+        self.worlds[i].reseed(hash((self.seed, i, self.episodes[i])) & ((1 << 64) - 1))
+        self._observe(i)
+
+    def _observe(self, i: int) -> None:
+        world = self.worlds[i]
+        observation = self.observations[i]
+        observation.fill(0)
+        for entity in world:
+            # Tags don't change during a game, so which channels an entity shows up in is worked out once.
+            mask = self.channels[entity]
+            if not mask:
+                continue
+            x, y = entity.position
+            for channel in range(len(CHANNELS)):
+                if mask & (1 << channel):
+                    observation[channel, y, x] = 1
+
+    def step(self, actions: Sequence[int] | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Make a move in every game, returns (observations, done).
+
+        Invalid moves, like walking into a wall, leave the game as it was. Finished games are reset, so their
+        observation is the start of the next episode."""
+        assert len(actions) == len(self), f"Need {len(self)} actions, got {len(actions)}"
+        done = np.zeros(len(self), dtype=bool)
+        for i, game in enumerate(self.games):
+            try:
+                game.move(MOVES[actions[i]])
+            except (ValueError, NoCollision) as e:
+                # Things the engine doesn't handle yet: pushing a barrel diagonally, and creatures with no
+                # collision rules between them sharing a tile.
+                logging.warning(f"Game {i} ended by an engine error: {e}")
+                game.player.alive = False
+            if game.player_alive():
+                self._observe(i)
+            else:
+                done[i] = True
+                self._reset(i)
+        return self.observations.copy(), done
@@ -1,47 +1,383 @@
 """Module for reading and manipulating the game board"""
 from __future__ import annotations
 
+import bisect
+import hashlib
 import logging
-from typing import Iterator, Optional, overload
+import random
+from copy import copy
+from functools import lru_cache
+from operator import attrgetter
+from typing import Iterator, NamedTuple, Optional, overload
 
-from game.entity_base import Entity, Tags
-from game.helper import Point, classproperty
-from GAME_CONSTANTS import WORLD_NAME
+from game.entity_base import Entity, TagBit, Tags
+from game.helper import IDLE, Point, get_point
+from game.state_machine import compile_species
+from game.tracing import Tracer
+
+log = Tracer(logging.INFO)
+# Tags that the map keeps row and column bitboards of, see Map.get_push_line_length. Boards are indexed by
+# position in here rather than by tag, as enum hashing is slow.
+BOARD_TAGS = Tags.solid, Tags.pushable, Tags.pusher
+SOLID, PUSHABLE, PUSHER = range(len(BOARD_TAGS))
+
+
+@lru_cache(maxsize=1 << 16)
+def zobrist_key(uid: int, kind: str, value) -> int:
+    """Random 64 bit number for an entity having a property.
+
+    Derived from a hash rather than a random generator, so every process agrees on the keys."""
+    return int.from_bytes(hashlib.blake2b(f"{uid} {kind} {value}".encode(), digest_size=8).digest(), "little")
+
+
+@lru_cache(maxsize=None)
+def is_resting_state(species: type, state: int) -> bool:
+    """Whether a species stays where it is, in the same state, forever once it's in this state (e.g. walls)"""
+    machine = compile_species(species)
+    return machine is not None and machine.transitions.get(state) == (IDLE, state)
+
+
+def is_asleep(entity: Entity) -> bool:
+    """Whether moving an entity would change nothing: it's in a resting state, and where its last move (if any)
+    left it"""
+    history = entity.position_history
+    return (not history or history[-1] == entity.position) and is_resting_state(type(entity), entity.state)
+
+
+def get_entity_hash(entity: Entity) -> int:
+    """An entity's contribution to the world hash"""
+    assert entity.uid is not None
+    return zobrist_key(entity.uid, "position", entity.position) ^ zobrist_key(entity.uid, "state", entity.state)
+
+
+class StepDelta(NamedTuple):
+    """Everything that changed on a map during one step, enough to undo it.
+
+    changed maps an entity to its (position, state, length of position_history) before the step. Every entity that
+    moves or tries to during the step is in it.
+    culled are the entities removed from the map during the step.
+    """
+
+    changed: dict[Entity, tuple[Point, int, int]]
+    culled: list[Entity]
+
+
+class MapTemplate(NamedTuple):
+    """A map as it was at some point, everything needed to put it back that way, see Map.reset.
+
+    Immutable, apart from boards which nothing writes to once it's made."""
+
+    snapshot: tuple
+    tiles: tuple[tuple[Point, tuple[Entity, ...]], ...]
+    crowded: frozenset[Point]
+    rows: tuple[tuple[int, ...], ...]
+    columns: tuple[tuple[int, ...], ...]
+    boards: dict[Entity, tuple[int, ...]]
+    hash: int
+    seed: int
+    steps_taken: int
 
 
 class Map:
-    worlds: dict[str, Map] = {}
-    current_world_name = WORLD_NAME
-    player: Optional[Entity] = None
+    """A world and everything in it. Nothing is shared between maps, so many can be played at once."""
 
-    def __init__(self, map_name: str, entities: list[Entity], player, dims) -> None:
+    def __init__(self, map_name: str, entities: list[Entity], player, dims, seed: Optional[int] = None) -> None:
         self.map_name: str = map_name
         self.dims: Point = dims
-        self.entities: list[Entity] = entities
         self.player: Entity = player
-        self.worlds[self.map_name] = self
+        # Number of times update_creatures has run.
+        self.steps_taken = 0
+        # Bumped whenever something happens that changes where creatures are heading, beyond their own moves.
+        # Used to know when predictions such as game.danger.DangerMap are out of date.
+        self.trajectory_version = 0
+        self.set_entities(entities)
+        self.reseed(random.getrandbits(63) if seed is None else seed)
+
+    def reseed(self, seed: int) -> None:
+        """Seed the world's random number generator, which decides anything left to chance (e.g. hop collisions)."""
+        self.seed = seed
+        self.rng = random.Random(seed)
 
     def set_entities(self, entities):
         """Used to reset a map."""
+        # Entities in uid order. Entities removed during a step stay in their slot as tombstones (entity.map is
+        # no longer this map) until cull_entities compacts the list at the end of the step.
         self.entities = entities
+        self.tombstones = 0
+        # Spatial index of the map. Entities on a tile are kept in the same order as self.entities (uid order)
+        # so collisions resolve identically to a scan of the entity list.
+        self.tiles: dict[Point, list[Entity]] = {}
+        # Tiles holding more than one entity, i.e. candidates for a collision.
+        self.crowded: set[Point] = set()
+        # Tiles that have become crowded since the collision resolver last cleared this, i.e. its next worklist.
+        self.entered: set[Point] = set()
+        # Bitboards of the tiles holding something with each of BOARD_TAGS. Bit x of rows[board][y] is tile (x, y),
+        # as is bit y of columns[board][x]. Only tiles in the map are tracked.
+        self.rows: list[list[int]] = [[0] * self.height for _ in BOARD_TAGS]
+        self.columns: list[list[int]] = [[0] * self.width for _ in BOARD_TAGS]
+        # Which boards each entity is on. Tags don't change once an entity is on a map.
+        self.boards: dict[Entity, tuple[int, ...]] = {}
+        # Zobrist hash of the positions and states of every entity, updated as they change.
+        self.hash: int = 0
+        # Records what changes while a step is being journaled, see start_journal.
+        self.journal: Optional[StepDelta] = None
+        self.trajectories_changed()
+        for uid, entity in enumerate(entities):
+            if entity.uid is None:
+                entity.uid = uid
+            entity.map = self
+            self.boards[entity] = tuple(board for board, tag in enumerate(BOARD_TAGS) if tag in entity.tags)
+            self._add_to_tile(entity, entity.position)
+            self.hash ^= get_entity_hash(entity)
+        # Entities update_creatures has to move, by uid. The rest are asleep: in a resting state, and already where
+        # their last move left them. They're woken by anything that changes their position or state.
+        self.awake: dict[int, Entity] = {entity.uid: entity for entity in entities if not is_asleep(entity)}
 
-    def update_creatures(self) -> None:
-        """Update all Creatures using move_object"""
+    def snapshot(self) -> tuple:
+        """Take a snapshot of the entities on the map, to be restored later."""
+        return tuple((entity, entity.get_snapshot()) for entity in self)
+
+    def restore(self, snapshot: tuple) -> None:
+        """Return the map to a snapshot, including entities that have been culled since."""
+        for entity in self.entities:
+            entity.map = None
+        for entity, entity_snapshot in snapshot:
+            entity.set_snapshot(entity_snapshot)
+        self.set_entities([entity for entity, _ in snapshot])
+
+    def make_template(self) -> MapTemplate:
+        """Take a template of the map, including its indexes, so it can be reset to it quickly."""
+        return MapTemplate(
+            self.snapshot(),
+            tuple((point, tuple(tile)) for point, tile in self.tiles.items()),
+            frozenset(self.crowded),
+            tuple(map(tuple, self.rows)),
+            tuple(map(tuple, self.columns)),
+            self.boards,
+            self.hash,
+            self.seed,
+            self.steps_taken,
+        )
+
+    def reset(self, template: MapTemplate) -> None:
+        """Put the map back how it was when the template was made, from this map.
+
+        Like restore, but the indexes are copied from the template rather than rebuilt entity by entity."""
         for entity in self.entities:
+            entity.map = None
+        entities = []
+        for entity, entity_snapshot in template.snapshot:
+            entity.set_snapshot(entity_snapshot)
+            entity.map = self
+            entities.append(entity)
+        self.entities = entities
+        self.tombstones = 0
+        self.awake = {entity.uid: entity for entity in entities if not is_asleep(entity)}
+        self.tiles = {point: list(tile) for point, tile in template.tiles}
+        self.crowded = set(template.crowded)
+        self.entered = set(template.crowded)
+        self.rows = [list(board) for board in template.rows]
+        self.columns = [list(board) for board in template.columns]
+        self.boards = template.boards
+        self.hash = template.hash
+        self.journal = None
+        self.steps_taken = template.steps_taken
+        self.reseed(template.seed)
+        self.trajectories_changed()
+
+    def fork(self) -> ForkedMap:
+        """Make a copy of the map to play ahead in, e.g. "what if the player moves LEFT then UP".
+
+        Forking is O(1). The fork shares everything with this map until it changes something, see ForkedMap. This
+        map mustn't change while the fork is in use."""
+        return ForkedMap(self)
+
+    def own(self, entity: Entity) -> Entity:
+        """This map's version of an entity. Only forks have versions of their own, see ForkedMap."""
+        return entity
+
+    def _add_to_tile(self, entity: Entity, point: Point) -> None:
+        tile = self.tiles.setdefault(point, [])
+        bisect.insort(tile, entity, key=attrgetter("uid"))
+        if len(tile) > 1:
+            self.crowded.add(point)
+            self.entered.add(point)
+        self._set_boards(entity, point)
+
+    def _remove_from_tile(self, entity: Entity, point: Point) -> None:
+        tile = self.tiles[point]
+        tile.remove(entity)
+        if len(tile) < 2:
+            self.crowded.discard(point)
+        if not tile:
+            del self.tiles[point]
+        self._clear_boards(entity, point, tile)
+
+    def _set_boards(self, entity: Entity, point: Point) -> None:
+        """Mark an entity on the bitboards, after it's added to a tile"""
+        x, y = point
+        if (boards := self.boards[entity]) and 0 <= x < self.dims.x and 0 <= y < self.dims.y:
+            for board in boards:
+                self.rows[board][y] |= 1 << x
+                self.columns[board][x] |= 1 << y
+
+    def _clear_boards(self, entity: Entity, point: Point, tile: list[Entity]) -> None:
+        """Unmark an entity on the bitboards, after it's removed from a tile, unless the tile is still on them"""
+        x, y = point
+        if (boards := self.boards[entity]) and 0 <= x < self.dims.x and 0 <= y < self.dims.y:
+            for board in boards:
+                if not tile or not any(board in self.boards[e] for e in tile):
+                    self.rows[board][y] &= ~(1 << x)
+                    self.columns[board][x] &= ~(1 << y)
+
+    def get_push_line_length(self, start: Point, direction: Point) -> int:
+        """Count the tiles in a row from start (exclusive) in direction that hold something pushable and nothing
+        solid or pushing, i.e. the line of things that would be pushed along.
+
+        Worked out from the bitboards in a few operations however long the line is. Only cardinal directions from
+        tiles in the map are counted, anything else returns 0 and is left to a walk over the tiles."""
+        if not self.is_in_map(start):
+            return 0
+        x, y = start
+        if direction.y == 0 and direction.x in (1, -1):
+            boards, line, i, step = self.rows, y, x, direction.x
+        elif direction.x == 0 and direction.y in (1, -1):
+            boards, line, i, step = self.columns, x, y, direction.y
+        else:
+            return 0
+        chain = boards[PUSHABLE][line] & ~(boards[SOLID][line] | boards[PUSHER][line])
+        if step == 1:
+            # Count the set bits in a row above bit i.
+            after = chain >> (i + 1)
+            return (~after & (after + 1)).bit_length() - 1
+        # Count the set bits in a row below bit i.
+        below = (1 << i) - 1
+        gaps = ~chain & below
+        return i - gaps.bit_length()
+
+    def move_entity(self, entity: Entity, old_position: Point, new_position: Point) -> None:
+        """Keep the spatial index in sync with an entity's position. Called by the Entity.position setter."""
+        if old_position == new_position:
+            return
+        self._record(entity, old_position, entity.state)
+        self._wake(entity)
+        self._remove_from_tile(entity, old_position)
+        self._add_to_tile(entity, new_position)
+        self.hash ^= zobrist_key(entity.uid, "position", old_position)
+        self.hash ^= zobrist_key(entity.uid, "position", new_position)
+
+    def change_state(self, entity: Entity, old_state: int, new_state: int) -> None:
+        """Keep the world hash in sync with an entity's state. Called by the Entity.state setter."""
+        if old_state != new_state:
+            self._record(entity, entity.position, old_state)
+            self._wake(entity)
+            self.hash ^= zobrist_key(entity.uid, "state", old_state)
+            self.hash ^= zobrist_key(entity.uid, "state", new_state)
+
+    def _wake(self, entity: Entity) -> None:
+        """Have update_creatures move an entity again, it's been disturbed"""
+        assert entity.uid is not None
+        self.awake[entity.uid] = entity
+
+    def _record(self, entity: Entity, position: Point, state: int, history_length: Optional[int] = None) -> None:
+        """Journal what an entity was like before it was first changed this step."""
+        if self.journal is None or entity in self.journal.changed:
+            return
+        if history_length is None:
+            # Entities append to their position_history right before they move, so that entry belongs to this step.
+            history_length = len(entity.position_history) - 1
+        self.journal.changed[entity] = position, state, history_length
+
+    def start_journal(self) -> None:
+        """Start recording changes to the map, so they can be undone."""
+        self.journal = StepDelta({}, [])
+
+    def stop_journal(self) -> StepDelta:
+        """Stop recording changes to the map, returns the changes made since start_journal."""
+        assert self.journal is not None, "Map isn't being journaled"
+        delta, self.journal = self.journal, None
+        return delta
+
+    def undo(self, delta: StepDelta) -> None:
+        """Undo the changes journaled in a StepDelta. Deltas must be undone newest first."""
+        assert self.journal is None, "Can't undo while journaling"
+        self.steps_taken -= 1
+        self.trajectories_changed()
+        for entity in delta.culled:
+            entity.alive = True
+            entity.map = self
+            bisect.insort(self.entities, entity, key=attrgetter("uid"))
+            self._add_to_tile(entity, entity.position)
+            self.hash ^= get_entity_hash(entity)
+        for entity, (position, state, history_length) in delta.changed.items():
+            entity.position = position
+            entity.state = state
+            del entity.position_history[history_length:]
+            self._wake(entity)
+
+    def compute_hash(self) -> int:
+        """Hash the world from scratch. Should always equal self.hash."""
+        world_hash = 0
+        for entity in self:
+            world_hash ^= get_entity_hash(entity)
+        return world_hash
+
+    def trajectories_changed(self) -> None:
+        """Note that creatures may not end up where their moves alone would take them, e.g. after a push or kill."""
+        self.trajectory_version += 1
+
+    def update_creatures(self) -> None:
+        """Update all Creatures using move_object. Asleep entities are skipped, moving them would change nothing."""
+        self.steps_taken += 1
+        for uid in sorted(self.awake):
+            entity = self.own(self.awake[uid])
+            self._record(entity, entity.position, entity.state, len(entity.position_history))
             new_position = entity.make_move()
 
-            if any(Tags.solid in e for e in self.entities if e.position == new_position and e != entity):
+            if any(e.tags.mask & TagBit.solid for e in self.tiles.get(new_position, ()) if e is not entity):
                 entity.position = entity.position_history[-1]
             assert self.is_in_map(new_position), f"{entity} tried to leave the play area at {new_position}!"
-        logging.info(self)
+            if is_asleep(entity):
+                del self.awake[uid]
+            else:
+                self.awake[uid] = entity
+        log(self.__str__)
 
     def is_in_map(self, point: Point) -> bool:
         """Return whether point lies in the map"""
         return 0 <= point.x < self.dims[0] and 0 <= point.y < self.dims[1]
 
+    def remove_entity(self, entity: Entity) -> None:
+        """Take an entity off the map, leaving a tombstone in self.entities until the next cull_entities."""
+        if entity.map is not self:
+            return
+        self._remove_from_tile(entity, entity.position)
+        self.hash ^= get_entity_hash(entity)
+        entity.map = None
+        assert entity.uid is not None
+        self.awake.pop(entity.uid, None)
+        self.tombstones += 1
+        self.trajectories_changed()
+        if self.journal is not None:
+            self.journal.culled.append(entity)
+
     def cull_entities(self):
-        # This should be in entities getter? less efficient, more readable?
-        self.entities = [e for e in self.entities if e.alive]
+        """Remove dead entities and clear out the tombstones. Done once at the end of a step.
+
+        Only awake entities are checked, asleep ones haven't done anything that could kill them."""
+        for entity in [e for e in self.awake.values() if not e.alive]:
+            self.remove_entity(entity)
+        if self.tombstones:
+            self._compact()
+            self.tombstones = 0
+
+    def _compact(self) -> None:
+        """Clear the tombstones out of the entity list"""
+        self.entities = [e for e in self.entities if e.map is self]
+
+    def count_entities(self) -> int:
+        """Number of entities on the map"""
+        return len(self.entities) - self.tombstones
 
     @property
     def height(self) -> int:
@@ -53,10 +389,6 @@ class Map:
         """Get the number of cols"""
         return self.dims.x
 
-    @classproperty
-    def world(self) -> Map:
-        return self.worlds[self.current_world_name]
-
     @overload
     def __getitem__(self, index: int) -> list:
         ...
@@ -68,20 +400,19 @@ class Map:
     def __getitem__(self, index: int | tuple) -> list[Entity] | list[list]:
         """Retrieve elements of the map at the given row or (row, col) pair"""
         if isinstance(index, int):
-            return [entity for entity in self.entities if entity.position.x == index]
-        elif isinstance(index, (tuple, Point)):
-            index = Point(*index)
-            return [entity for entity in self.entities if entity.position == index]
+            return [entity for entity in self if entity.position.x == index]
+        elif isinstance(index, tuple):
+            return list(self.tiles.get(get_point(*index), ()))
         raise ValueError
 
-    def __iter__(self) -> Iterator:
-        self.entities.sort(key=lambda x: x.position)
-        yield from self.entities
+    def __iter__(self) -> Iterator[Entity]:
+        """Iterate over the entities on the map in uid order, skipping tombstones"""
+        return (entity for entity in self.entities if entity.map is self)
 
     def __str__(self) -> str:
         """Get a human friendly representation of the map"""
         _map = [[" "] * self.width for _col in range(self.height)]
-        for entity in self.entities:
+        for entity in self:
             pos = entity.position
             _map[pos.y][pos.x] = entity.name[0]
 
@@ -94,3 +425,189 @@ class Map:
 
     def __len__(self) -> int:
         raise NotImplementedError
+
+
+class ForkedTiles(dict):
+    """Spatial index of a fork. A tile is copied from the parent map the first time it's looked at."""
+
+    def __init__(self, fork: ForkedMap) -> None:
+        super().__init__()
+        self.fork = fork
+        # Tiles emptied in the fork, which mustn't be copied from the parent again.
+        self.gone: set[Point] = set()
+
+    def _copy_tile(self, point: Point) -> Optional[list[Entity]]:
+        if point in self.gone or (tile := self.fork.parent.tiles.get(point)) is None:
+            return None
+        self.fork.check_parent()
+        tile = [self.fork.own(e) for e in tile]
+        dict.__setitem__(self, point, tile)
+        return tile
+
+    def __missing__(self, point: Point) -> list[Entity]:
+        if (tile := self._copy_tile(point)) is None:
+            raise KeyError(point)
+        return tile
+
+    def get(self, point: Point, default=None):
+        try:
+            return self[point]
+        except KeyError:
+            return default
+
+    def __contains__(self, point) -> bool:
+        return dict.__contains__(self, point) or self._copy_tile(point) is not None
+
+    def setdefault(self, point: Point, default=None):
+        if point in self:
+            return self[point]
+        self.gone.discard(point)
+        dict.__setitem__(self, point, default)
+        return default
+
+    def __delitem__(self, point: Point) -> None:
+        dict.__delitem__(self, point)
+        self.gone.add(point)
+
+    def copy_all(self) -> None:
+        """Copy every tile not copied yet, for anything that looks at the whole map"""
+        for point in self.fork.parent.tiles.keys():
+            if not dict.__contains__(self, point):
+                self._copy_tile(point)
+
+    def keys(self):
+        self.copy_all()
+        return dict.keys(self)
+
+    def values(self):
+        self.copy_all()
+        return dict.values(self)
+
+    def items(self):
+        self.copy_all()
+        return dict.items(self)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        self.copy_all()
+        return dict.__len__(self)
+
+
+class ForkedMap(Map):
+    """A copy-on-write copy of a map, made by Map.fork.
+
+    Entities are shared with the parent until the fork needs them, then copied (see Entity.__copy__) and the copy is
+    used from then on. Tiles and bitboards are the same. So a fork costs nothing to make, and a step in it only
+    copies what the step changes: the awake entities, and the ones on tiles with collisions. Asking for the whole
+    entity list or iterating over the fork copies everything.
+
+    The parent mustn't change while the fork is in use, which is checked with the parent's hash.
+    """
+
+    def __init__(self, parent: Map) -> None:
+        assert parent.journal is None, "Can't fork in the middle of a step"
+        self.parent = parent
+        self.parent_hash = parent.hash
+        self.map_name = parent.map_name
+        self.dims = parent.dims
+        self.steps_taken = parent.steps_taken
+        self.trajectory_version = parent.trajectory_version
+        self.seed = parent.seed
+        self.rng = random.Random()
+        self.rng.setstate(parent.rng.getstate())
+        # Parent entity (or copy) -> the fork's copy.
+        self.copies: dict[Entity, Entity] = {}
+        # The parent's entity list, until the fork needs a list of its own.
+        self._entities: list[Entity] = parent.entities
+        self.shared_entities = True
+        self.tombstones = parent.tombstones
+        # Parent entities until update_creatures moves them.
+        self.awake = dict(parent.awake)
+        self.tiles = ForkedTiles(self)
+        self.crowded = set(parent.crowded)
+        self.entered = set(parent.entered)
+        # Shared with the parent until first written.
+        self.rows = parent.rows
+        self.columns = parent.columns
+        self.boards = {}
+        self.hash = parent.hash
+        self.journal = None
+        self.player = self.own(parent.player)
+
+    def check_parent(self) -> None:
+        assert self.parent.hash == self.parent_hash, f"{self.parent.map_name} has changed since it was forked"
+
+    def own(self, entity: Entity) -> Entity:
+        """The fork's copy of an entity, copied from the parent the first time it's asked for"""
+        if (clone := self.copies.get(entity)) is not None:
+            return clone
+        original = self.parent.own(entity)
+        if (clone := self.copies.get(original)) is None:
+            self.check_parent()
+            clone = copy(original)
+            clone.map = self if original.map is self.parent else None
+            self.boards[clone] = self.parent.boards[original]
+            self.copies[original] = self.copies[clone] = clone
+        self.copies[entity] = clone
+        return clone
+
+    @property
+    def entities(self) -> list[Entity]:
+        if self.shared_entities:
+            self._entities = [self.own(e) for e in self._entities]
+            self.shared_entities = False
+        return self._entities
+
+    @entities.setter
+    def entities(self, entities: list[Entity]) -> None:
+        self._entities = entities
+        self.shared_entities = False
+
+    def __iter__(self) -> Iterator[Entity]:
+        if not self.shared_entities:
+            return super().__iter__()
+        return (entity for entity in map(self.own, self._entities) if entity.map is self)
+
+    def _compact(self) -> None:
+        """Clear the tombstones out of the entity list, without copying the entities still shared with the parent"""
+        self._entities = [
+            e
+            for e in self._entities
+            if (clone := self.copies.get(e)) is None and e.map is self.parent or clone is not None and clone.map is self
+        ]
+
+    def count_entities(self) -> int:
+        return len(self._entities) - self.tombstones
+
+    def make_template(self) -> MapTemplate:
+        """Until the fork moves on from how it was forked, the parent's template will do and nothing is copied."""
+        if self.steps_taken == self.parent.steps_taken and self.hash == self.parent_hash:
+            self.check_parent()
+            return self.parent.make_template()
+        return super().make_template()
+
+    def restore(self, snapshot: tuple) -> None:
+        """Restore a snapshot of the fork or its parent. Everything is copied, so the fork stops sharing anything."""
+        super().restore(tuple((self.own(entity), entity_snapshot) for entity, entity_snapshot in snapshot))
+
+    def reset(self, template: MapTemplate) -> None:
+        """Reset to a template of the fork or its parent. A template's indexes hold the parent's entities rather than
+        the fork's copies, so it's restored entity by entity instead."""
+        self.restore(template.snapshot)
+        self.steps_taken = template.steps_taken
+        self.reseed(template.seed)
+
+    def _own_boards(self) -> None:
+        if self.rows is self.parent.rows:
+            self.rows = [list(board) for board in self.rows]
+            self.columns = [list(board) for board in self.columns]
+
+    def _set_boards(self, entity: Entity, point: Point) -> None:
+        self._own_boards()
+        super()._set_boards(entity, point)
+
+    def _clear_boards(self, entity: Entity, point: Point, tile: list[Entity]) -> None:
+        self._own_boards()
+        super()._clear_boards(entity, point, tile)
@@ -0,0 +1,132 @@
+"""Record games and play them back headless, as fast as possible.
+
+A replay is the world it was played in, the seed of the world's random number generator, every action taken and
+the world's hash at the end. Playing a replay back must end with the same hash, or the engine has changed how the
+game plays out. Useful for bug reports and for checking engine changes against a pile of recorded games:
+
+    python -m game.replay replays/*.replay
+
+File format: b"FROGREPLAY", a version byte, then a zlib compressed body of
+    world name length (u16), world name (utf-8), seed (u64), final hash (u64), number of actions (u32)
+followed by the actions, packed two to a byte.
+"""
+from __future__ import annotations
+
+import logging
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from game.game import Game
+from game.helper import DOWN, LEFT, RIGHT, UP, Point, report_to_stdout
+from game.world_loader import parse_entities
+
+MAGIC = b"FROGREPLAY"
+VERSION = 1
+# Actions are stored as their index in here. None is Game.undo.
+ACTIONS: tuple[Optional[Point], ...] = (UP, DOWN, LEFT, RIGHT, None)
+HEADER = struct.Struct("<QQI")
+
+# Results, see report_to_stdout.
+report = logging.getLogger(__name__)
+
+
+class Replay(NamedTuple):
+    world_name: str
+    seed: int
+    actions: tuple[Optional[Point], ...]
+    final_hash: int
+
+
+class PlaybackResult(NamedTuple):
+    replay: Replay
+    final_hash: int
+    seconds: float
+    # The engine error the playback stopped at, if any. Replays of bug reports are expected to have one.
+    error: Optional[str] = None
+
+    @property
+    def matches(self) -> bool:
+        return self.final_hash == self.replay.final_hash
+
+    @property
+    def steps_per_second(self) -> float:
+        return len(self.replay.actions) / self.seconds if self.seconds else float("inf")
+
+
+def record(game: Game) -> Replay:
+    """Get the replay of everything played in the game's current world so far"""
+    assert game.recording is not None, "Game isn't being recorded"
+    return Replay(game.map.map_name, game.map.seed, tuple(game.recording), game.map.hash)
+
+
+def encode(replay: Replay) -> bytes:
+    codes = [ACTIONS.index(action) for action in replay.actions]
+    if len(codes) % 2:
+        codes.append(0)
+    packed = bytes(codes[i] << 4 | codes[i + 1] for i in range(0, len(codes), 2))
+    name = replay.world_name.encode()
+    body = struct.pack("<H", len(name)) + name
+    body += HEADER.pack(replay.seed, replay.final_hash, len(replay.actions)) + packed
+    return MAGIC + bytes([VERSION]) + zlib.compress(body, 9)
+
+
+def decode(data: bytes) -> Replay:
+    assert data.startswith(MAGIC), "Not a replay file"
+    version = data[len(MAGIC)]
+    assert version == VERSION, f"Can't read replay version {version}"
+    body = zlib.decompress(data[len(MAGIC) + 1 :])
+    (name_length,) = struct.unpack_from("<H", body)
+    world_name = body[2 : 2 + name_length].decode()
+    seed, final_hash, n_actions = HEADER.unpack_from(body, 2 + name_length)
+    packed = body[2 + name_length + HEADER.size :]
+    codes = [code for byte in packed for code in (byte >> 4, byte & 0xF)]
+    return Replay(world_name, seed, tuple(ACTIONS[code] for code in codes[:n_actions]), final_hash)
+
+
+def save_replay(replay: Replay, path: Path | str) -> None:
+    Path(path).write_bytes(encode(replay))
+
+
+def load_replay(path: Path | str) -> Replay:
+    return decode(Path(path).read_bytes())
+
+
+def play_replay(replay: Replay) -> PlaybackResult:
+    """Play a replay without any rendering, returns the hash of the world it ended in."""
+    world = parse_entities(replay.world_name)
+    world.reseed(replay.seed)
+    game = Game(world)
+
+    error = None
+    start = time.perf_counter()
+    try:
+        for action in replay.actions:
+            if action is None:
+                game.undo()
+            else:
+                game.move(action)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return PlaybackResult(replay, game.map.hash, time.perf_counter() - start, error)
+
+
+def main(paths: list[str]) -> int:
+    """Play back replay files, returns the number that didn't match."""
+    report_to_stdout(report)
+    mismatches = 0
+    for path in paths:
+        result = play_replay(load_replay(path))
+        mismatches += not result.matches
+        status = "ok" if result.matches else "MISMATCH"
+        report.info(f"{status} {path}: {len(result.replay.actions)} actions, {result.steps_per_second:.0f} steps/s")
+        if result.error:
+            report.info(f"    Stopped at {result.error}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(min(main(sys.argv[1:]), 255))
@@ -0,0 +1,254 @@
+"""Breadth-first puzzle solver.
+
+Plays every sequence of moves from a loaded world through Game.move, so the same collision rules apply as in real
+play. Worlds are rewound between attempts with Map.snapshot/Map.restore. States that have been seen before are
+recognised by the world's Zobrist hash (Map.hash) and the steps left in a transposition table and skipped.
+
+    game = Game(parse_entities("stage_test"))
+    moves = solve(game, goal=reach(Point(3, 4)))
+
+solve_parallel does the same search one depth at a time, splitting the frontier over a pool of processes.
+States are sent between processes as packed snapshots, keyed like the transposition table.
+
+Note: Hop-vs-hop collisions kill one of the two frogs at random, stages relying on those may solve differently to
+how they play.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import multiprocessing
+from collections import deque
+from typing import Callable, Hashable, Iterator, NamedTuple, Optional, cast
+
+from game.collision_resolver import NoCollision
+from game.danger import DangerMap
+from game.entity_base import Entity
+from game.game import Game
+from game.helper import DOWN, LEFT, RIGHT, UP, Point
+from game.transposition import TranspositionTable
+from game.world_loader import parse_entities
+
+MOVES = UP, DOWN, LEFT, RIGHT
+
+
+class SearchResult(NamedTuple):
+    """moves is the shortest sequence of moves reaching the goal, or None if there is none within the step budget"""
+
+    moves: Optional[list[Point]]
+    states_explored: int
+
+
+def survive(game: Game) -> bool:
+    """Goal: Use up every step without dying"""
+    return game.player_alive() and not game.get_steps_left()
+
+
+def _reached(point: Point, game: Game) -> bool:
+    return game.player_alive() and game.get_player_pos() == point
+
+
+def reach(point: Point) -> Callable[[Game], bool]:
+    """Goal: Get the player to a point"""
+    # A partial rather than a closure, so it can be sent to solve_parallel's workers.
+    return functools.partial(_reached, point)
+
+
+def dominates(goal: Callable[[Game], bool]) -> bool:
+    """Whether seeing a world with more steps left makes seeing it again with fewer pointless for this goal.
+
+    True for reach, where more steps can only help. Not for survive, which needs the steps to run out, or for goals
+    the solver doesn't know."""
+    return getattr(goal, "func", None) is _reached
+
+
+def expand(game: Game, snapshot: tuple, danger: Optional[DangerMap] = None) -> Iterator[tuple[Point, tuple]]:
+    """Try every move from a snapshot. Yields (move, resulting snapshot) for each move the player survives.
+
+    Moves onto tiles the danger map predicts to be deadly aren't tried.
+    The game is left in the resulting state until the next move is tried."""
+    deadly: frozenset[Point] = frozenset()
+    if danger is not None:
+        game.map.restore(snapshot)
+        deadly = danger.deadly_tiles()
+    for move in MOVES:
+        game.map.restore(snapshot)
+        if game.get_player_pos() + move in deadly:
+            continue
+        try:
+            if not game.move(move):
+                continue
+        except (ValueError, NoCollision) as e:
+            # Things the engine doesn't handle yet: pushing a barrel diagonally, and creatures with no collision rules
+            # between them sharing a tile.
+            logging.debug(f"Solver skipped move {move}: {e}")
+            continue
+        if game.player_alive():
+            yield move, game.map.snapshot()
+
+
+def solve(
+    game: Game,
+    goal: Callable[[Game], bool] = survive,
+    max_steps: Optional[int] = None,
+    table: Optional[TranspositionTable] = None,
+    prune: bool = False,
+) -> SearchResult:
+    """Find the shortest sequence of moves that reaches the goal.
+
+    Args:
+        game: The game to solve, in the state to search from. It's returned to this state afterwards.
+        goal: Predicate that is True once the game is solved.
+        max_steps: The maximum number of moves to search. Defaults to the steps the player has left.
+        table: Transposition table of worlds that have already been seen. Bounds the memory used by the search.
+            Must be exact unless the goal dominates.
+        prune: Skip moves onto tiles predicted to be deadly instead of playing them. Faster, but may miss
+            solutions where the player knocks a frog off course (e.g. with a push) in the same step.
+
+    Returns the moves and how many states were explored.
+    """
+    world = game.map
+    start = world.snapshot()
+    if max_steps is None:
+        max_steps = game.get_steps_left()
+    if table is None:
+        table = TranspositionTable(exact=not dominates(goal))
+    assert table.exact or dominates(goal), "The goal needs an exact transposition table"
+    danger = DangerMap(world, horizon=1) if prune else None
+
+    if goal(game):
+        return SearchResult([], 1)
+
+    # Don't record the millions of moves tried.
+    recording, game.recording = game.recording, None
+    # Breadth first means a state is always first seen with the fewest moves, and so the most steps left.
+    # Paths are linked lists of (move, previous path) so they share their beginnings.
+    table.store(world.hash, max_steps)
+    frontier: deque[tuple[tuple, Optional[tuple], int]] = deque([(start, None, 0)])
+    explored = 1
+    try:
+        while frontier:
+            snapshot, path, depth = frontier.popleft()
+            if depth >= max_steps:
+                continue
+            for move, child in expand(game, snapshot, danger):
+                if table.check_and_store(world.hash, max_steps - depth - 1):
+                    continue
+                explored += 1
+                child_path = move, path
+                if goal(game):
+                    return SearchResult(_unwind(child_path), explored)
+                frontier.append((child, child_path, depth + 1))
+        return SearchResult(None, explored)
+    finally:
+        world.restore(start)
+        game.recording = recording
+
+
+def _unwind(path: Optional[tuple]) -> list[Point]:
+    moves = []
+    while path is not None:
+        move, path = path
+        moves.append(move)
+    return moves[::-1]
+
+
+# Each solve_parallel worker plays its own copy of the world.
+_worker_game: Optional[Game] = None
+# The worker's entities by uid.
+_worker_entities: list[Entity] = []
+
+
+def _pack(game: Game) -> tuple:
+    """Snapshot that can be sent to other processes.
+
+    Entities are identified by their uid, which is their order in the world file. Entry uid is the entity's
+    snapshot, or None if it's dead (no longer on the map)."""
+    live = {cast(int, entity.uid): entity.get_snapshot() for entity in game.map}
+    return tuple(live.get(uid) for uid in range(max(live) + 1))
+
+
+def _unpack(entities: list[Entity], packed: tuple) -> tuple:
+    """Map.snapshot of the worker's entities from a packed snapshot. Entities past the end of it are dead too."""
+    return tuple((entities[uid], snapshot) for uid, snapshot in enumerate(packed) if snapshot is not None)
+
+
+def _state_key(game: Game, exact: bool) -> Hashable:
+    return (game.map.hash, game.get_steps_left()) if exact else game.map.hash
+
+
+def _init_worker(world_name: str) -> None:
+    global _worker_game, _worker_entities
+    logging.disable(logging.INFO)
+    _worker_game = Game(parse_entities(world_name))
+    _worker_game.recording = None
+    _worker_entities = list(_worker_game.entities)
+    assert all(entity.uid == uid for uid, entity in enumerate(_worker_entities)), "Entities aren't in uid order"
+
+
+def _expand_chunk(chunk: list[tuple[Hashable, tuple]], goal: Callable[[Game], bool], exact: bool) -> list[tuple]:
+    """Expand part of the frontier in a worker.
+
+    Returns (parent key, move, key, packed snapshot, solved) for each new state, without duplicates."""
+    game, entities = _worker_game, _worker_entities
+    assert game, "Worker wasn't initialised"
+    seen = set()
+    children: list[tuple] = []
+    for parent_key, packed in chunk:
+        for move, _ in expand(game, _unpack(entities, packed)):
+            key = _state_key(game, exact)
+            if key in seen:
+                continue
+            seen.add(key)
+            children.append((parent_key, move, key, _pack(game), goal(game)))
+    return children
+
+
+def solve_parallel(
+    game: Game,
+    goal: Callable[[Game], bool] = survive,
+    max_steps: Optional[int] = None,
+    processes: Optional[int] = None,
+) -> SearchResult:
+    """solve, with each depth of the search split over a pool of processes.
+
+    Workers load the world from file by name, then search from the game's current state.
+    goal must be picklable, i.e. a module level function or a partial of one like reach.
+    """
+    if max_steps is None:
+        max_steps = game.get_steps_left()
+    if goal(game):
+        return SearchResult([], 1)
+
+    processes = processes or multiprocessing.cpu_count()
+    exact = not dominates(goal)
+    key = _state_key(game, exact)
+    parents: dict[Hashable, Optional[tuple[Hashable, Point]]] = {key: None}
+    frontier = [(key, _pack(game))]
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(game.map.map_name,)) as pool:
+        for _ in range(max_steps):
+            if not frontier:
+                break
+            # Several chunks per process, so a slow chunk doesn't leave the others idle.
+            n_chunks = min(len(frontier), processes * 4)
+            chunks = [(frontier[i::n_chunks], goal, exact) for i in range(n_chunks)]
+            frontier = []
+            for children in pool.starmap(_expand_chunk, chunks):
+                for parent_key, move, key, packed, solved in children:
+                    # Workers only know about their own chunk, duplicates between them are removed here.
+                    if key in parents:
+                        continue
+                    parents[key] = parent_key, move
+                    if solved:
+                        return SearchResult(_backtrack(parents, key), len(parents))
+                    frontier.append((key, packed))
+    return SearchResult(None, len(parents))
+
+
+def _backtrack(parents: dict, key) -> list[Point]:
+    moves = []
+    while (parent := parents[key]) is not None:
+        key, move = parent
+        moves.append(move)
+    return moves[::-1]
@@ -0,0 +1,125 @@
+"""Compile creature movement patterns into transition tables.
+
+Most creatures are pure finite state machines: their _get_move maps a state to a (move, next state) pair.
+compile_species turns a species into a StateMachine by asking _get_move about every state, and works out where
+each state's sequence of moves starts repeating. That lets us answer "where will this creature be after t steps"
+in O(1) instead of replaying t steps.
+
+The answers assume nothing gets in the creature's way: solids, pushes, kills and barrels stopping at the edge of
+the map are all up to the caller.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import NamedTuple, Optional, Type
+
+from game.entity import InvalidState, Player
+from game.entity_base import Entity
+from game.helper import IDLE, Point
+
+# Highest state number probed when compiling a species.
+MAX_STATES = 16
+
+
+class Orbit(NamedTuple):
+    """The path taken from a starting state.
+
+    The first tail steps are never repeated, after which the next cycle steps repeat forever.
+    states[i] is the state after i steps, for i in range(tail + cycle).
+    offsets[i] is the displacement after i steps, for i in range(tail + cycle + 1).
+    """
+
+    tail: int
+    cycle: int
+    states: tuple[int, ...]
+    offsets: tuple[Point, ...]
+
+    @property
+    def drift(self) -> Point:
+        """Net displacement over one full cycle"""
+        return self.offsets[-1] - self.offsets[self.tail]
+
+    def offset(self, steps: int) -> Point:
+        """Displacement after a number of steps"""
+        if steps <= self.tail:
+            return self.offsets[steps]
+        laps, remainder = divmod(steps - self.tail, self.cycle)
+        return self.offsets[self.tail + remainder] + self.drift * laps
+
+    def state(self, steps: int) -> int:
+        """State after a number of steps"""
+        if steps < self.tail:
+            return self.states[steps]
+        return self.states[self.tail + (steps - self.tail) % self.cycle]
+
+
+class StateMachine:
+    """Transition table of a species: state -> (move, next state)"""
+
+    def __init__(self, name: str, transitions: dict[int, tuple[Point, int]]) -> None:
+        self.name = name
+        self.transitions = transitions
+        self.orbits: dict[int, Orbit] = {state: self._trace(state) for state in transitions}
+
+    def _trace(self, state: int) -> Orbit:
+        """Follow the transitions from state until a state repeats"""
+        seen: dict[int, int] = {}
+        offsets = [IDLE]
+        while state not in seen:
+            if state not in self.transitions:
+                raise InvalidState(f"{self.name} transitions to unknown state {state}")
+            seen[state] = len(seen)
+            move, state = self.transitions[state]
+            offsets.append(offsets[-1] + move)
+        tail = seen[state]
+        return Orbit(tail, len(seen) - tail, tuple(seen), tuple(offsets))
+
+    def move(self, state: int) -> tuple[Point, int]:
+        """Same as _get_move for a creature in this state"""
+        return self.transitions[state]
+
+    def cycle_length(self, state: int) -> int:
+        return self.orbits[state].cycle
+
+    def drift(self, state: int) -> Point:
+        return self.orbits[state].drift
+
+    def state_at(self, state: int, steps: int) -> int:
+        """The state after a number of steps"""
+        return self.orbits[state].state(steps)
+
+    def position_at(self, position: Point, state: int, steps: int) -> Point:
+        """Where a creature starting at position in state will be after a number of steps"""
+        return position + self.orbits[state].offset(steps)
+
+    def __repr__(self) -> str:
+        return f"StateMachine({self.name}, states={sorted(self.transitions)})"
+
+
+def _probe_species(species: Type[Entity]) -> Optional[dict[int, tuple[Point, int]]]:
+    """Find the (move, next state) of every state of a species by asking _get_move.
+
+    Returns None for species whose moves aren't a pure function of their state (e.g. Player)."""
+    if issubclass(species, Player):
+        return None
+    # An entity without a map can be asked about any state, it doesn't care where it is.
+    probe = species()
+    transitions = {}
+    for state in range(MAX_STATES):
+        probe.state = state
+        try:
+            transitions[state] = probe._get_move()
+        except InvalidState:
+            continue
+        except NotImplementedError:
+            return None
+    return transitions
+
+
+@lru_cache(maxsize=None)
+def compile_species(species: Type[Entity]) -> Optional[StateMachine]:
+    """Compile a species' _get_move into a StateMachine. None if it isn't a state machine."""
+    transitions = _probe_species(species)
+    if transitions is None:
+        return None
+    return StateMachine(species.__name__, transitions)
@@ -0,0 +1,51 @@
+"""Tracing for the simulation step loop, which costs nothing when its level is disabled.
+
+Checks the log level before formatting anything. Expensive messages can be passed as a function that builds
+the message, it's only called if the message will be logged:
+
+    log = Tracer(logging.INFO)
+    log("Settling collisions")
+    log(lambda: f"{point} contains {world[point]}")
+    with log.indented():
+        log("This message is indented")
+"""
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Union
+
+from game.helper import c
+
+Message = Union[str, Callable[[], str]]
+
+
+class Tracer:
+    """Logs at a fixed level, indenting messages by how many indented() blocks deep they are."""
+
+    def __init__(self, level: int, logger: logging.Logger = logging.root) -> None:
+        self.level = level
+        self.logger = logger
+        self.depth = 0
+        self.maximum_indent = 2
+        self.fg: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.logger.isEnabledFor(self.level)
+
+    def __call__(self, msg: Message) -> None:
+        """Log."""
+        if not self.logger.isEnabledFor(self.level):
+            return
+        if callable(msg):
+            msg = msg()
+        prefix = "    " * min(self.depth, self.maximum_indent)
+        self.logger.log(self.level, c(prefix + msg, fg=self.fg))
+
+    @contextmanager
+    def indented(self) -> Iterator[None]:
+        """Indent messages logged within this block"""
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
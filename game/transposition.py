@@ -0,0 +1,81 @@
+"""Bounded table of world states that have already been searched, keyed by the world's Zobrist hash (Map.hash).
+
+Every non-player creature is periodic and its phase is part of its state, which is hashed. So worlds reached at
+steps t and t + k * p, where p is the lowest common multiple of the creatures' cycle lengths (see
+StateMachine.cycle_length), with everything else equal have the same hash, only the number of steps the player has
+left differs.
+
+Whether those are the same state depends on the goal. When getting somewhere, seeing a world again with fewer steps
+left can't lead anywhere new, so an entry remembers the most steps left its world was seen with. When the goal
+depends on the steps left, like surviving until they run out, it can, so an exact table keys entries on
+(hash, steps left) instead.
+"""
+from typing import Optional
+
+# Odd 64 bit constant, spreads the steps left of an exact entry over the table.
+_STEPS_MIX = 0x9E3779B97F4A7C15
+
+
+class TranspositionTable:
+    """Fixed size hash table of world hash -> most steps left the world was seen with.
+
+    Each key has exactly one slot. When two worlds want the same slot, the one with more steps left to search
+    keeps it (depth-preferred replacement), so the table never grows past its capacity.
+    Losing an entry only means that world may be searched again.
+
+    With exact=True a world only counts as seen with exactly the same number of steps left.
+    """
+
+    def __init__(self, capacity: int = 1 << 20, exact: bool = False) -> None:
+        self.capacity = capacity
+        self.exact = exact
+        self.hashes: list[Optional[int]] = [None] * capacity
+        self.steps_left: list[int] = [0] * capacity
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+
+    def _slot(self, world_hash: int, steps_left: int) -> int:
+        if self.exact:
+            return (world_hash ^ (steps_left * _STEPS_MIX)) % self.capacity
+        return world_hash % self.capacity
+
+    def _covers(self, stored_steps_left: int, steps_left: int) -> bool:
+        """Whether an entry stored with stored_steps_left makes searching with steps_left pointless"""
+        if self.exact:
+            return stored_steps_left == steps_left
+        return stored_steps_left >= steps_left
+
+    def seen(self, world_hash: int, steps_left: int) -> bool:
+        """Whether the world has already been seen with at least (or, if exact, exactly) this many steps left"""
+        slot = self._slot(world_hash, steps_left)
+        if self.hashes[slot] == world_hash and self._covers(self.steps_left[slot], steps_left):
+            self.hits += 1
+            return True
+        return False
+
+    def store(self, world_hash: int, steps_left: int) -> None:
+        """Remember that a world has been seen with a number of steps left"""
+        slot = self._slot(world_hash, steps_left)
+        stored = self.hashes[slot]
+        if stored == world_hash and self._covers(self.steps_left[slot], steps_left):
+            return
+        if stored is not None and (stored != world_hash or self.exact):
+            if self.steps_left[slot] > steps_left:
+                self.rejections += 1
+                return
+            self.replacements += 1
+        self.hashes[slot] = world_hash
+        self.steps_left[slot] = steps_left
+        self.stores += 1
+
+    def check_and_store(self, world_hash: int, steps_left: int) -> bool:
+        """Store the world, returns True if it had already been seen with these steps left"""
+        if self.seen(world_hash, steps_left):
+            return True
+        self.store(world_hash, steps_left)
+        return False
+
+    def __len__(self) -> int:
+        return self.capacity - self.hashes.count(None)
@@ -0,0 +1,215 @@
+"""Binary world files, a compact replacement for the world builder's pickles.
+
+Pickles of nested lists of dicts are slow to decode, several times bigger than they need to be, and unpickling runs
+whatever code is in the file. A .world file is a header and two flat arrays, read straight out of the file with mmap:
+
+    python -m game.world_format maps/stage_test.map    # Writes maps/stage_test.world
+
+File format, little endian: b"FROGWORLD", a version byte, then
+    width (u16), height (u16), tile layers (u8), number of tile names (u16), species (u16), tag names (u8),
+    entities (u32)
+then the tile names, species names and tag names, each a length (u8) then utf-8, then padding to a multiple of 4
+bytes, followed by
+    the tile layer, height * width * layers tiles, each tile (u16), sprite_col (u8), sprite_row (u8), where tile 0
+    is an empty layer and tile i is tile name i - 1
+    the entity table, one row per entity in the order they're added to the map, each species (u16), x (u16),
+    y (u16), facing (u8), padding (u8), tags (u32)
+Tag masks in the entity table are bits of the file's tag names, so changing Tags doesn't break old files.
+
+NumPy is only imported once a world is read or written, so importing the game doesn't pay for it.
+"""
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from game.entity_base import Facing
+from game.helper import Point, report_to_stdout
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAGIC = b"FROGWORLD"
+VERSION = 1
+SUFFIX = ".world"
+HEADER = struct.Struct("<HHBHHBI")
+# Species the game doesn't support yet, they're left out when a world is converted.
+SKIPPED_SPECIES = ("InvisWall",)
+
+report = logging.getLogger(__name__)
+
+
+class WorldData(NamedTuple):
+    """A decoded world file. The arrays are read only, and may be views of the file."""
+
+    dims: Point
+    tile_names: tuple[str, ...]
+    # (height, width, layers) of the tile dtype.
+    tiles: np.ndarray
+    species: tuple[str, ...]
+    tag_names: tuple[str, ...]
+    # One row of the entity dtype per entity.
+    entities: np.ndarray
+
+
+@lru_cache(maxsize=1)
+def get_dtypes() -> tuple[np.dtype, np.dtype]:
+    """The (tile, entity) dtypes of the arrays in a world file"""
+    import numpy as np
+
+    tile_dtype = np.dtype([("tile", "<u2"), ("sprite_col", "u1"), ("sprite_row", "u1")])
+    entity_dtype = np.dtype(
+        [("species", "<u2"), ("x", "<u2"), ("y", "<u2"), ("facing", "u1"), ("padding", "u1"), ("tags", "<u4")]
+    )
+    return tile_dtype, entity_dtype
+
+
+def str_to_facing(dir: str) -> Facing:
+    # TODO: make this an enum? XD
+    match dir.upper():
+        case "UP":
+            return Facing.UP
+        case "RIGHT":
+            return Facing.RIGHT
+        case "DOWN":
+            return Facing.DOWN
+        case "LEFT":
+            return Facing.LEFT
+    logging.warning(f"direction {dir} not recognised in map parser")
+    return Facing.UP
+
+
+def from_lists(base_list: list, entity_list: list) -> WorldData:
+    """Convert the (base_list, entity_list) of a world builder pickle.
+
+    Only what the game uses is kept: the name and sprite of each tile, and the species, position, facing and tags of
+    each entity."""
+    import numpy as np
+
+    tile_dtype, entity_dtype = get_dtypes()
+    height, width = len(entity_list), len(entity_list[0])
+    layers = max((len(cell) for row in base_list for cell in row), default=0)
+    tile_names: dict[str, int] = {}
+    tiles = np.zeros((height, width, layers), dtype=tile_dtype)
+    for y, row in enumerate(base_list):
+        for x, cell in enumerate(row):
+            for layer, tile in enumerate(cell):
+                tile_id = tile_names.setdefault(tile["name"], len(tile_names)) + 1
+                tiles[y, x, layer] = tile_id, tile["sprite_col"], tile["sprite_row"]
+
+    species: dict[str, int] = {}
+    tag_names: dict[str, int] = {}
+    rows = []
+    for y, row in enumerate(entity_list):
+        for x, cell in enumerate(row):
+            for dict_entity in cell:
+                if dict_entity["name"] in SKIPPED_SPECIES:
+                    continue
+                mask = 0
+                for tag in dict_entity["tags"]:
+                    mask |= 1 << tag_names.setdefault(tag, len(tag_names))
+                facing = str_to_facing(dict_entity["direction"])
+                rows.append((species.setdefault(dict_entity["name"], len(species)), x, y, facing, 0, mask))
+    assert len(tag_names) <= 32, "Too many tags for the entity table"
+    entities = np.array(rows, dtype=entity_dtype)
+    tiles.flags.writeable = entities.flags.writeable = False
+    return WorldData(Point(width, height), tuple(tile_names), tiles, tuple(species), tuple(tag_names), entities)
+
+
+def _pack_names(names: tuple[str, ...]) -> bytes:
+    packed = b""
+    for name in names:
+        encoded = name.encode()
+        packed += bytes([len(encoded)]) + encoded
+    return packed
+
+
+def encode(world: WorldData) -> bytes:
+    tile_dtype, entity_dtype = get_dtypes()
+    height, width, layers = world.tiles.shape
+    header = HEADER.pack(
+        width, height, layers, len(world.tile_names), len(world.species), len(world.tag_names), len(world.entities)
+    )
+    data = MAGIC + bytes([VERSION]) + header
+    data += _pack_names(world.tile_names) + _pack_names(world.species) + _pack_names(world.tag_names)
+    data += bytes(-len(data) % 4)
+    return data + world.tiles.astype(tile_dtype).tobytes() + world.entities.astype(entity_dtype).tobytes()
+
+
+def decode(buffer) -> WorldData:
+    """Decode a world file from a bytes-like object. The arrays are views of the buffer, nothing is copied."""
+    import numpy as np
+
+    tile_dtype, entity_dtype = get_dtypes()
+    data = memoryview(buffer)
+    assert data[: len(MAGIC)] == MAGIC, "Not a world file"
+    version = data[len(MAGIC)]
+    assert version == VERSION, f"Can't read world version {version}"
+    offset = len(MAGIC) + 1
+    width, height, layers, n_tile_names, n_species, n_tags, n_entities = HEADER.unpack_from(data, offset)
+    offset += HEADER.size
+
+    def read_names(count: int) -> tuple[str, ...]:
+        nonlocal offset
+        names = []
+        for _ in range(count):
+            length = data[offset]
+            names.append(bytes(data[offset + 1 : offset + 1 + length]).decode())
+            offset += 1 + length
+        return tuple(names)
+
+    tile_names, species, tag_names = read_names(n_tile_names), read_names(n_species), read_names(n_tags)
+    offset += -offset % 4
+    n_tiles = height * width * layers
+    tiles = np.frombuffer(data, dtype=tile_dtype, count=n_tiles, offset=offset).reshape(height, width, layers)
+    offset += tiles.nbytes
+    entities = np.frombuffer(data, dtype=entity_dtype, count=n_entities, offset=offset)
+    tiles.flags.writeable = entities.flags.writeable = False
+    return WorldData(Point(width, height), tile_names, tiles, species, tag_names, entities)
+
+
+def read_world(path: Path | str) -> WorldData:
+    """Map a world file into memory and decode it. Pages are only read from disk as the arrays are used."""
+    with open(path, "rb") as file:
+        # The arrays keep the map open, it's closed when the last of them is freed.
+        return decode(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def write_world(world: WorldData, path: Path | str) -> None:
+    """Write a world file. The old file is replaced rather than overwritten, as it may still be mapped into memory."""
+    path = Path(path)
+    new_path = path.with_name(path.name + ".new")
+    new_path.write_bytes(encode(world))
+    os.replace(new_path, path)
+
+
+def convert(pickle_path: Path | str) -> Path:
+    """Convert a world builder pickle to a .world file next to it, returns the new file's path"""
+    pickle_path = Path(pickle_path)
+    with open(pickle_path, "rb") as file:
+        base_list, entity_list = pickle.load(file)
+    world_path = pickle_path.with_suffix(SUFFIX)
+    write_world(from_lists(base_list, entity_list), world_path)
+    return world_path
+
+
+def main(args: list[str]) -> int:
+    report_to_stdout(report)
+    if not args:
+        report.info("Usage: python -m game.world_format <world builder .map files>")
+        return 1
+    for path in args:
+        world_path = convert(path)
+        report.info(f"{path} ({Path(path).stat().st_size} bytes) -> {world_path} ({world_path.stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
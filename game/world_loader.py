@@ -0,0 +1,68 @@
+"""Module for decoding world files created with the world builder into game worlds.
+
+This module must not import pygame, so the simulation can be run without a display.
+Building basemap surfaces from the decoded tiles is handled by gui.map_parser."""
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+from game import entity  # noqa: F401 Importing the species registers them in SPECIES
+from game.entity_base import SPECIES, Entity, Facing, Tags
+from game.helper import get_point
+from game.map import Map
+from game.world_format import SUFFIX, WorldData, read_world
+
+WORLD_DIR = Path(__file__).parent.parent / "maps"
+
+
+def build_entities(world: WorldData) -> list[Entity]:
+    """Build the entities in a world's entity table.
+
+    The table is unpacked a column at a time, and tags are worked out once for each combination in the file."""
+    table = world.entities
+    species = [SPECIES[name] for name in world.species]
+    facings = list(Facing)
+    tag_bits = [Tags[name]._value_ for name in world.tag_names]
+    masks: dict[int, int] = {}
+    for file_mask in set(table["tags"].tolist()):
+        masks[file_mask] = sum(bit for i, bit in enumerate(tag_bits) if file_mask >> i & 1)
+
+    all_entities_list = []
+    columns = (table[column].tolist() for column in ("species", "x", "y", "facing", "tags"))
+    for species_id, x, y, facing, file_mask in zip(*columns):
+        new_entity_obj = species[species_id](position=get_point(x, y), facing=facings[facing])
+        new_entity_obj.tags.mask |= masks[file_mask]
+        all_entities_list.append(new_entity_obj)
+    return all_entities_list
+
+
+def get_world_path(world_name) -> Path:
+    """The .world file a world is loaded from.
+
+    World builder pickles aren't loaded, they're converted to .world files by game.world_format."""
+    world_file = WORLD_DIR / Path(world_name).with_suffix(SUFFIX).name
+    assert world_file.exists(), f"Can't find world file: '{world_file}'. Convert .map files with game.world_format"
+    pickle_file = world_file.with_suffix(".map")
+    if pickle_file.exists() and pickle_file.stat().st_mtime > world_file.stat().st_mtime:
+        logging.warning(f"{pickle_file} is newer than {world_file}, convert it again with game.world_format")
+    return world_file
+
+
+@lru_cache(maxsize=32)
+def decode_world_file(path: Path, mtime_ns: int) -> WorldData:
+    """Decode a .world file. Cached by modification time, so edited files are decoded again."""
+    return read_world(path)
+
+
+def load_world_data(world_name) -> WorldData:
+    """Decode a world. Each file is only decoded once, everything that needs the world shares the same WorldData."""
+    path = get_world_path(world_name)
+    return decode_world_file(path, path.stat().st_mtime_ns)
+
+
+def parse_entities(world_name) -> Map:
+    """loads a world file, returns the world built from its entity table"""
+    world = load_world_data(world_name)
+    en = build_entities(world)
+    player = [e for e in en if Tags.player in e][0]
+    return Map(world_name, en, player, world.dims)
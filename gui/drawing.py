@@ -3,12 +3,12 @@ from __future__ import annotations
 import logging
 import math
 from copy import copy
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Optional
 
 import pygame as pg
 
 from game.entity import Tags
-from GAME_CONSTANTS import ANIMATION_LENGTH, FPS, PASSIVE_ANIMATION_SPEED
+from GAME_CONSTANTS import ANIMATION_LENGTH, FPS, PASSIVE_ANIMATION_SPEED, TSIZE
 from gui.asset_loader import get_creature_sprite, get_default_sprite, get_random_sprite
 from gui.helper import coords_to_pixels, get_disp
 from gui.hud import add_hud
@@ -23,13 +23,19 @@ def draw_game(
     clock: pg.time.Clock,
     entities: list,
     center: Point,
+    danger: Optional[Iterable[Point]] = None,
 ):
-    """Draws entities on basemap"""
+    """Draws entities on basemap, over a red tint on any tiles in danger"""
 
     # TODO: Improve sprite animation stage transitions.
     animation_stage = [0, 2, 3][(pg.time.get_ticks() // PASSIVE_ANIMATION_SPEED) % 3]
 
     scene = copy(basemap)
+    if danger:
+        tint = pg.Surface((TSIZE, TSIZE), pg.SRCALPHA)
+        tint.fill((255, 0, 0, 80))
+        for point in danger:
+            scene.blit(tint, coords_to_pixels(point))
     for entity in entities:
         if Tags.no_animation not in entity:
             sprite = get_creature_sprite(entity, animation_stage)
@@ -48,12 +54,14 @@ def draw_game(
 def get_interpolated_position(entity, travel_progress: float) -> Point:
     """Get the position of the entity between tiles
 
-    The source point is the last entity position,
+    The source point is the last entity position, or the current one for entities that have never moved.
     The destination point is the current entity position
 
     Returns:
         The point at travel_progress% of the way between the source and destination points.
     """
+    if not entity.position_history:
+        return entity.position
     last_position = entity.position_history[-1]
     difference = entity.position - last_position
     return last_position + difference * travel_progress
@@ -3,35 +3,44 @@
 Controller: Parses user input and sends to game.
 Viewer: Shows a visual representation of the game state.
 """
+import time
+from pathlib import Path
+
 import pygame as pg
 
+from game.danger import DangerMap
 from game.game import Game
+from game.replay import record, save_replay
 from GAME_CONSTANTS import *
 from gui.death import play_death_animation
 from gui.drawing import animate_step, draw_game
 from gui.hud import hud
-from gui.map_parser import parse_basemap
+from gui.map_parser import basemaps
 from gui.user_input import process_user_input
 
 pg.init()
 
 
-def play_game_loop(screen: pg.Surface, clock: pg.time.Clock) -> None:
-    game = Game()
-    basemaps = {}
-    for world in game.worlds.values():
-        basemaps[world.map_name] = parse_basemap(world.map_name)
+def play_game_loop(screen: pg.Surface, clock: pg.time.Clock, game: Game) -> None:
     hud.update_step_counter(game.get_steps_left())
     map_changed = False
     entities = game.entities
+    danger = DangerMap(game.map, horizon=1)
 
     while True:
         if ANIMATIONS and map_changed:
             animate_step(basemaps[game.map.map_name], screen, clock, entities)
         entities = game.entities
-        draw_game(basemaps[game.map.map_name], screen, clock, entities, center=game.get_player_pos())
+        if danger.world is not game.map:
+            danger = DangerMap(game.map, horizon=1)
+        deadly = danger.deadly_tiles() if SHOW_DANGER else None
+        draw_game(basemaps[game.map.map_name], screen, clock, entities, center=game.get_player_pos(), danger=deadly)
 
         if not game.player_alive():
+            if SAVE_REPLAYS:
+                Path(REPLAY_DIR).mkdir(exist_ok=True)
+                # Nanoseconds, so games ending within the same second don't overwrite each other.
+                save_replay(record(game), Path(REPLAY_DIR, f"{game.map.map_name}_{time.time_ns()}.replay"))
             return
 
         # Process User Input
@@ -45,6 +54,9 @@ def main() -> None:
         pg.SCALED | pg.RESIZABLE,
     )
     clock = pg.time.Clock()
+    game = Game()
     while True:
-        play_game_loop(screen, clock)
+        play_game_loop(screen, clock, game)
         play_death_animation(screen)
+        # Start over from the world's template, nothing is loaded again.
+        game.restart()
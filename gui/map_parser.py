@@ -1,15 +1,16 @@
-"""Module for handling parsing of files created with the world builder for game use"""
+"""Module for building basemap surfaces from files created with the world builder
+
+Decoding world files into entities lives in game.world_loader, which doesn't need pygame."""
 # import itertools
 import json
-import logging
-import pickle
+from functools import lru_cache
 from pathlib import Path
 
 import pygame as pg
 
-from game.entity_base import SPECIES, Entity, Facing, Tags
-from game.helper import Point
-from game.map import Map
+from game.cache import LRUCache
+from game.world_format import WorldData
+from game.world_loader import load_world_data
 from GAME_CONSTANTS import *
 
 
@@ -37,74 +38,26 @@ def get_sprite_box(row: int = 0, col: int = 0) -> tuple[int, int, int, int]:
 # could include: facing specific, animation, state specific, all of which requite handling in gui.asset_loader
 # def parse_sprites() -> dict[str: list(pygame.surface)]:
 
-WORLD_DIR = Path("maps")
-assert WORLD_DIR.exists(), "Can't find world_dir"
-
-
-def str_to_facing(dir: str) -> Facing:
-    # TODO: make this an enum? XD
-    match dir.upper():
-        case "UP":
-            return Facing.UP
-        case "RIGHT":
-            return Facing.RIGHT
-        case "DOWN":
-            return Facing.DOWN
-        case "LEFT":
-            return Facing.LEFT
-    logging.warning(f"direction {dir} not recognised in map parser")
-    return Facing.UP
-
 
-def load_entities(unparsed_entities_list: list) -> list[Entity]:
+def load_background(world: WorldData, names_to_spritesheet: dict[str, pg.Surface]) -> pg.Surface:
     """
-    turns the entity lololod into loEntities
-    Entities need: name
-    """
-    all_entities_list = []
-    for x, column in enumerate(unparsed_entities_list):
-        for y, tile in enumerate(column):
-            for dict_entity in tile:
-                # InvisWall not currently supported
-                if dict_entity["name"] == "InvisWall":
-                    continue
-                entity_class = SPECIES[dict_entity["name"]]
-                new_entity_obj = entity_class(position=Point(y, x))
-                # There is definitely a better way to do this, maybe .get(), but that returns Nones
-                # @Liam None is False. Time for a walrus? :)
-                # What happens when extending a list with None?
-                # All entities should have tags even if its empty []
-                assert "tags" in dict_entity
-                new_entity_obj.tags.extend(dict_entity["tags"])
-
-                assert "direction" in dict_entity
-                new_entity_obj._facing = str_to_facing(dict_entity["direction"])
-                # new_entity_obj.sprites_dict = parse_sprites()
-                all_entities_list.append(new_entity_obj)
-
-    return all_entities_list
-
-
-def load_background(base_list: list, names_to_spritesheet: dict[str, pg.Surface]) -> pg.Surface:
-    """
-    Builds the basemap from the tile list(s)
+    Builds the basemap from the tile layer
     """
     # TODO: Remove reliance upon the json file maybe
 
-    world_width = len(base_list[0])
-    world_height = len(base_list)
+    world_width, world_height = world.dims
 
     play_area = pg.Surface(((world_width + WINDOW_TILE_WIDTH) * TSIZE, (world_height + WINDOW_TILE_HEIGHT) * TSIZE))
 
-    # Populate the play area
-    for y, row in enumerate(base_list):
-        for x, space in enumerate(row):
-            for tile in space:
-                play_area.blit(
-                    names_to_spritesheet[tile["name"]],
-                    get_sprite_box(x + WINDOW_TILE_WIDTH // 2, y + WINDOW_TILE_HEIGHT // 2),
-                    get_sprite_box(tile["sprite_col"], tile["sprite_row"]),
-                )
+    # Populate the play area, layer by layer from the bottom. Tile 0 is an empty layer.
+    tiles = world.tiles
+    for y, x, layer in zip(*(axis.tolist() for axis in tiles["tile"].nonzero())):
+        tile_id, sprite_col, sprite_row = tiles[y, x, layer].tolist()
+        play_area.blit(
+            names_to_spritesheet[world.tile_names[tile_id - 1]],
+            get_sprite_box(x + WINDOW_TILE_WIDTH // 2, y + WINDOW_TILE_HEIGHT // 2),
+            get_sprite_box(sprite_col, sprite_row),
+        )
 
     return play_area
     # It's not important to pad the world so the player can't see the void when close to world edges.
@@ -122,10 +75,12 @@ def load_background(base_list: list, names_to_spritesheet: dict[str, pg.Surface]
 world_name: str | Path = "map1.map"
 
 
-def get_sprites(base_list: list[dict], entity_list: list[dict]) -> dict[str, pg.surface]:
+@lru_cache(maxsize=None)
+def get_sprites() -> dict[str, pg.surface]:
     """
     Looks at json to find filenames by name
     makes a corresponding dict of name: pg.surface
+    Every world uses the same sprites, so they're only loaded once.
     """
     # load the json
     with open("assets/assets.json") as file:
@@ -140,51 +95,23 @@ def get_sprites(base_list: list[dict], entity_list: list[dict]) -> dict[str, pg.
     return names_to_spritesheet
 
 
-def unfuck_world_name(world_name: Path | str) -> Path:
-    """
-    Somewhere an extra maps/ is added to world name, and whether .map is included is inconsistent
-    This is a bandage fn to fix these inconsistencies
-    """
-    # TODO: Figure out where the extra "maps/" is coming from
-    # TODO: make this less dirty
-    # TODO: Make the get world name a function so its not Write Everything Thrice
-    world_file_name = Path(world_name).with_suffix(".map")
-    world_file_name = WORLD_DIR / world_file_name.name
-    assert world_file_name.exists(), f"Can't find world file: '{world_file_name}'"
-    return world_file_name
-
-
 def parse_basemap(world_name) -> pg.Surface:
-    """loads map pickle, returns basemap and entity list"""
-    # Both the parse fns load the entities and basemap bits. This is less efficient that it could be
-
-    world_file = unfuck_world_name(world_name)
-
-    with open(world_file, "rb") as file:
-        base_list, entity_list = pickle.load(file)
+    """loads a world file, returns its basemap"""
+    # The world file is decoded once and shared with game.world_loader.parse_entities.
+    world = load_world_data(world_name)
     # TODO: integrate with the latest builder change and remove this
     # The shit bit where we add the file names to the dict:
-    names_to_spritesheet = get_sprites(base_list, entity_list)
+    names_to_spritesheet = get_sprites()
 
-    bg = load_background(base_list, names_to_spritesheet)
+    bg = load_background(world, names_to_spritesheet)
     return bg
 
 
-def parse_entities(world_name) -> None:
-    """loads map pickle, returns entity list"""
-    world_file = unfuck_world_name(world_name)
-
-    with open(world_file, "rb") as file:
-        base_list, entity_list = pickle.load(file)
-
-    en = load_entities(entity_list)
-    player = [e for e in en if Tags.player in e][0]
-    Map(world_name, en, player, get_dims(world_name))
+def get_basemap_size(basemap: pg.Surface) -> int:
+    return basemap.get_width() * basemap.get_height() * basemap.get_bytesize()
 
 
-def get_dims(world_name) -> Point:
-    world_file = unfuck_world_name(world_name)
-    with open(world_file, "rb") as file:
-        base_list, entity_list = pickle.load(file)
-    dims = Point(len(entity_list[0]), len(entity_list))
-    return dims
+# Basemaps are big, so only the most recently played worlds' are kept.
+basemaps: LRUCache[str, pg.Surface] = LRUCache(
+    parse_basemap, BASEMAP_CACHE_SIZE, BASEMAP_CACHE_BYTES, get_basemap_size, name="basemap cache"
+)
@@ -16,6 +16,7 @@ def process_event(event: pg.event.Event, game: Game) -> bool:
     D: move right
     Q: quits the game
     R: kills the player (Restart)
+    U: undoes the last step
 
     Returns:
         bool: If movement input was accepted (Screen must be redrawn)
@@ -26,6 +27,10 @@ def process_event(event: pg.event.Event, game: Game) -> bool:
         match event.key:
             case pg.K_r:
                 game.kill_all()
+            case pg.K_u:
+                # Not returning True, there's no step to animate.
+                if game.undo():
+                    hud.update_step_counter(game.get_steps_left())
 
             case pg.K_w | pg.K_UP:
                 return game.move(UP)
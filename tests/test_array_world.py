@@ -0,0 +1,32 @@
+import random
+
+from game.array_world import ArrayWorld
+from game.collision_resolver import resolve_collisions
+from game.game import Game
+from game.helper import DOWN, LEFT, RIGHT, UP
+from game.world_loader import parse_entities
+
+
+def test_matches_object_path():
+    for seed in range(20):
+        rng = random.Random(seed)
+        objects, arrays = Game(parse_entities("stage_test")), Game(parse_entities("stage_test"))
+        for _ in range(30):
+            direction = rng.choice([UP, DOWN, LEFT, RIGHT])
+            if objects._is_move_invalid(objects.get_player_pos() + direction, direction):
+                continue
+            objects.move(direction)
+            world = ArrayWorld(arrays.map)
+            world.update_creatures(direction)
+            world.sync_entities()
+            resolve_collisions(arrays.map)
+            arrays.map.cull_entities()
+
+            assert arrays.map.hash == objects.map.hash
+            assert len(arrays.entities) == len(objects.entities)
+            for mine, theirs in zip(arrays.entities, objects.entities):
+                assert (mine.position, mine.state, mine.alive) == (theirs.position, theirs.state, theirs.alive)
+                assert mine.position_history == theirs.position_history
+            assert arrays.get_steps_left() == objects.get_steps_left()
+            if not objects.player_alive():
+                break
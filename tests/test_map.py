@@ -0,0 +1,40 @@
+from game.entity import FrogR, Player, RockWall
+from game.entity_base import Tags
+from game.game import Game
+from game.helper import LEFT, Point, get_point
+from game.map import Map
+
+
+def make_field(size: int) -> Map:
+    """A walled field with a frog hopping along one row and the player in a corner"""
+    walls = [
+        RockWall(position=get_point(x, y), tags=[Tags.solid])
+        for x in range(size)
+        for y in range(size)
+        if x in (0, size - 1) or y in (0, size - 1)
+    ]
+    frog = FrogR(position=get_point(size // 2, size // 2), tags=[Tags.hops, Tags.kills_player, Tags.pusher])
+    player = Player(position=get_point(2, 2), tags=[Tags.player, Tags.pusher, Tags.hops])
+    player.steps_left = 10
+    return Map("field", walls + [frog, player], player, Point(size, size), seed=0)
+
+
+def test_fork_step_copies_only_what_changes():
+    parent = make_field(32)
+    parent_hash = parent.hash
+    fork = parent.fork()
+    game = Game(fork, template=parent.make_template())
+    assert game.move(LEFT)
+    # The player and the frog moved, the walls didn't.
+    assert len(fork.copies) < 10 < len(parent.entities)
+    assert parent.hash == parent_hash
+    assert fork.hash != parent_hash and fork.hash == fork.compute_hash()
+
+
+def test_fork_has_its_own_tags():
+    parent = make_field(8)
+    fork = parent.fork()
+    player = fork.own(parent.player)
+    player.tags.remove(Tags.hops)
+    assert Tags.hops in parent.player.tags
+    assert Tags.hops not in player.tags
@@ -0,0 +1,47 @@
+from game.entity import Barrel, FrogR, Player
+from game.entity_base import Tags
+from game.game import Game
+from game.helper import LEFT, Point, get_point
+from game.map import Map
+
+
+def barrel(x: int) -> Barrel:
+    return Barrel(position=get_point(x, 1), tags=[Tags.pushable, Tags.barrel])
+
+
+def player(x: int, y: int = 1) -> Player:
+    return Player(position=get_point(x, y), tags=[Tags.player, Tags.pusher, Tags.hops])
+
+
+def make_row(*entities) -> Game:
+    """A 5x3 world with no walls, so the edge of the map is all that stops anything"""
+    hero = [e for e in entities if isinstance(e, Player)][0]
+    hero.steps_left = 10
+    return Game(Map("row", list(entities), hero, Point(5, 3), seed=0))
+
+
+def test_push():
+    pushed = barrel(1)
+    game = make_row(pushed, player(2))
+    assert game.move(LEFT)
+    assert pushed.position == get_point(0, 1)
+    assert game.get_player_pos() == get_point(1, 1)
+
+
+def test_player_cant_push_off_the_map():
+    barrels = barrel(0), barrel(1)
+    game = make_row(*barrels, player(2))
+    assert not game.move(LEFT)
+    assert [b.position for b in barrels] == [get_point(0, 1), get_point(1, 1)]
+    assert game.get_player_pos() == get_point(2, 1)
+
+
+def test_creature_bounces_off_a_barrel_at_the_edge():
+    # In state 1 a FrogR hops left.
+    pushed = barrel(0)
+    frog = FrogR(position=get_point(1, 1), tags=[Tags.hops, Tags.kills_player, Tags.pusher], state=1)
+    game = make_row(pushed, frog, player(4, 2))
+    assert game.move(LEFT)
+    assert pushed.position == get_point(0, 1)
+    assert frog.position == get_point(1, 1)
+    assert game.map.hash == game.map.compute_hash()
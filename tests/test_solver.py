@@ -0,0 +1,53 @@
+from game.entity import Player, RockWall
+from game.game import Game
+from game.helper import UP, Point, get_point
+from game.map import Map
+from game.solver import _pack, _unpack, reach, solve, survive
+from game.transposition import TranspositionTable
+
+
+def make_room(size: int, steps_left: int) -> Game:
+    """An empty walled room with the player in the middle"""
+    walls = [
+        RockWall(position=get_point(x, y))
+        for x in range(size)
+        for y in range(size)
+        if x in (0, size - 1) or y in (0, size - 1)
+    ]
+    player = Player(position=get_point(size // 2, size // 2))
+    player.steps_left = steps_left
+    return Game(Map("room", walls + [player], player, Point(size, size), seed=0))
+
+
+def test_survive_empty_room():
+    # The player walks around in circles, revisiting worlds with fewer steps left.
+    for steps_left in range(1, 8):
+        game = make_room(7, steps_left)
+        result = solve(game, goal=survive)
+        assert result.moves is not None and len(result.moves) == steps_left
+        assert game.get_steps_left() == steps_left
+
+
+def test_reach_empty_room():
+    game = make_room(7, 10)
+    assert solve(game, goal=reach(Point(1, 1))).moves is not None
+    assert solve(game, goal=reach(Point(0, 0))).moves is None
+
+
+def test_keeps_empty_table():
+    table = TranspositionTable(exact=True)
+    solve(make_room(7, 3), table=table)
+    assert len(table)
+
+
+def test_pack_after_cull():
+    game, fresh = make_room(5, 3), make_room(5, 3)
+    wall = game.entities[0]
+    game.map.remove_entity(wall)
+    game.map.cull_entities()
+    game.move(UP)
+    fresh_wall = fresh.entities[0]
+    fresh.map.restore(_unpack(list(fresh.entities), _pack(game)))
+    assert fresh.map.hash == game.map.hash
+    assert fresh.get_player_pos() == game.get_player_pos() and fresh.get_steps_left() == 2
+    assert fresh_wall.map is None
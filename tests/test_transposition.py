@@ -0,0 +1,17 @@
+from game.transposition import TranspositionTable
+
+
+def test_dominating_table():
+    table = TranspositionTable(capacity=64)
+    assert not table.check_and_store(1234, 5)
+    assert table.seen(1234, 4)
+    assert not table.seen(1234, 6)
+
+
+def test_exact_table():
+    table = TranspositionTable(capacity=64, exact=True)
+    assert not table.check_and_store(1234, 5)
+    assert not table.check_and_store(1234, 4)
+    assert table.seen(1234, 5) and table.seen(1234, 4)
+    assert not table.seen(1234, 3)
+    assert len(table) == 2
@@ -0,0 +1,25 @@
+import random
+
+from game.game import Game
+from game.helper import DOWN, LEFT, RIGHT, UP
+from game.world_loader import parse_entities
+
+
+def get_state(game: Game) -> list[tuple]:
+    """Everything about the entities that a step can change"""
+    return [(e.uid, e.position, e.state, e.alive, list(e.position_history)) for e in game.entities]
+
+
+def test_undo_random_moves():
+    for seed in range(20):
+        rng = random.Random(seed)
+        game = Game(parse_entities("stage_test"))
+        start_hash, start_state = game.map.hash, get_state(game)
+        steps_left = game.get_steps_left()
+        while game.player_alive() and len(game.undo_history) < 30:
+            game.move(rng.choice([UP, DOWN, LEFT, RIGHT]))
+        while game.undo():
+            pass
+        assert game.map.hash == start_hash == game.map.compute_hash()
+        assert get_state(game) == start_state
+        assert game.get_steps_left() == steps_left
@@ -0,0 +1,341 @@
+"""Engine benchmark suite.
+
+Builds synthetic worlds of growing size with a controlled mix of creatures, then times loading them and stepping
+them with Game.move, and each part of a step (Map.update_creatures, resolve_collisions, Map.cull_entities) on its
+own. Nothing is drawn, so it runs without a display.
+
+    python -m tools.benchmark --save benchmarks/baseline.json
+    python -m tools.benchmark --compare benchmarks/baseline.json
+
+Points allocated per step are counted with and without helper.get_point's interning, to show what it saves.
+
+Comparing against a baseline fails (exit code 1) if anything got more than --tolerance times slower or hungrier.
+Per entity timings should stay flat as the worlds grow, if they climb with size something has gone quadratic.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from statistics import median
+from typing import Callable, Iterator
+
+from game import helper
+from game.collision_resolver import NoCollision, resolve_collisions
+from game.entity_base import Tags
+from game.game import Game
+from game.helper import DOWN, LEFT, RIGHT, UP, Point, report_to_stdout
+from game.map import Map
+from game.world_format import decode, encode, from_lists
+from game.world_loader import build_entities
+
+SIZES = (16, 64, 256, 1024)
+# Relative amounts of each species in a world.
+MIXES = {
+    "frogs": {"FrogR": 1, "FrogY": 1, "FrogP": 1},
+    "mixed": {"FrogR": 2, "FrogY": 2, "FrogP": 2, "Barrel": 1, "Stone": 1},
+    "pushing": {"FrogR": 1, "FrogY": 1, "Barrel": 3, "Stone": 3},
+}
+# Tags the world builder gives each species.
+TAGS = {
+    "Player": [Tags.player, Tags.pusher, Tags.hops],
+    "FrogR": [Tags.hops, Tags.kills_player, Tags.pusher],
+    "FrogY": [Tags.hops, Tags.kills_player, Tags.pusher],
+    "FrogP": [Tags.hops, Tags.kills_player, Tags.pusher],
+    "Barrel": [Tags.pushable, Tags.barrel],
+    "Stone": [Tags.solid],
+    "RockWall": [Tags.solid],
+}
+MOVES = UP, DOWN, LEFT, RIGHT
+# Worlds are rewound to how they were loaded this often, so creatures killing each other doesn't thin them out.
+RESET_EVERY = 25
+# Things the engine doesn't handle yet: pushing a barrel diagonally, and creatures with no collision rules between
+# them sharing a tile. A step that hits one is cut short but the world is still in one piece, so play goes on from
+# there. They're counted and reported, as they make the timings less comparable.
+ENGINE_ERRORS = ValueError, NoCollision
+
+# Results, see report_to_stdout.
+report = logging.getLogger(__name__)
+
+
+def make_world_file(size: int, mix: dict[str, int], density: float, seed: int = 0) -> bytes:
+    """Make a square world in the same format as the .world files in maps/.
+
+    The world is walled in with RockWalls. Creatures are kept two tiles in from the walls so they never try to move
+    through them, and the player starts in the middle.
+    """
+    rng = random.Random(seed)
+    base_list = [[[{"name": "Grass", "sprite_col": 0, "sprite_row": 0}] for _ in range(size)] for _ in range(size)]
+    entity_list: list[list[list[dict]]] = [[[] for _ in range(size)] for _ in range(size)]
+
+    def put(name: str, x: int, y: int) -> None:
+        entity_list[y][x].append({"name": name, "tags": [tag.name for tag in TAGS[name]], "direction": "Up"})
+
+    for i in range(size):
+        for x, y in ((i, 0), (i, size - 1), (0, i), (size - 1, i)):
+            if not entity_list[y][x]:
+                put("RockWall", x, y)
+
+    centre = Point(size // 2, size // 2)
+    put("Player", *centre)
+    inner = [Point(x, y) for x in range(3, size - 3) for y in range(3, size - 3) if Point(x, y) != centre]
+    names = list(mix)
+    weights = list(mix.values())
+    for point in rng.sample(inner, int(len(inner) * density)):
+        put(rng.choices(names, weights)[0], *point)
+    return encode(from_lists(base_list, entity_list))
+
+
+def load_world(name: str, world_file: bytes) -> Map:
+    """Decode a world, as world_loader.parse_entities does for files in maps/"""
+    world = decode(world_file)
+    entities = build_entities(world)
+    player = [e for e in entities if Tags.player in e][0]
+    return Map(name, entities, player, world.dims, seed=0)
+
+
+class Bench:
+    """Plays one world, rewinding it every RESET_EVERY steps and whenever the player dies."""
+
+    def __init__(self, name: str, world_file: bytes, seed: int = 0) -> None:
+        self.world = load_world(name, world_file)
+        self.game = Game(self.world)
+        self.game.recording = None
+        # Plenty of steps for the whole benchmark.
+        self.game.player.steps_left = 1 << 30
+        self.start = self.world.make_template()
+        self.rng = random.Random(seed)
+        self.steps = 0
+        self.errors = 0
+
+    def rewind(self) -> None:
+        self.world.reset(self.start)
+        self.game.undo_history.clear()
+
+    def prepare(self) -> None:
+        """Get ready for the next step, outside of any timing."""
+        if self.steps % RESET_EVERY == 0 or not self.game.player_alive():
+            self.rewind()
+        self.steps += 1
+
+    def move(self) -> None:
+        """One step through Game.move. Invalid moves are retried as another direction."""
+        for direction in self.rng.sample(MOVES, len(MOVES)):
+            if self.game.move(direction):
+                return
+
+    def parts(self) -> tuple[Callable[[], object], ...]:
+        """The parts of Game.move, to be timed separately"""
+
+        def queue_move() -> None:
+            self.game.player.move_queue = [self.rng.choice(MOVES)]
+            self.world.update_creatures()
+
+        return queue_move, functools.partial(resolve_collisions, self.world), self.world.cull_entities
+
+
+def time_steps(bench: Bench, steps: int, step: Callable[[], None]) -> list[float]:
+    """Seconds spent in each of steps calls to step"""
+    times = []
+    for _ in range(steps):
+        bench.prepare()
+        start = time.perf_counter()
+        try:
+            step()
+        except ENGINE_ERRORS:
+            bench.errors += 1
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def time_parts(bench: Bench, steps: int) -> list[list[float]]:
+    """Seconds spent in each part of a step, for steps steps"""
+    times: list[list[float]] = [[], [], []]
+    for _ in range(steps):
+        bench.prepare()
+        try:
+            for i, part in enumerate(bench.parts()):
+                start = time.perf_counter()
+                part()
+                times[i].append(time.perf_counter() - start)
+        except ENGINE_ERRORS:
+            bench.errors += 1
+    return times
+
+
+def measure_allocations(bench: Bench, steps: int) -> tuple[float, float]:
+    """Mean peak memory allocated during a step, and mean memory left allocated after it, in bytes"""
+    peak = retained = 0
+    tracemalloc.start()
+    try:
+        for _ in range(steps):
+            bench.prepare()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            try:
+                bench.move()
+            except ENGINE_ERRORS:
+                bench.errors += 1
+            after, step_peak = tracemalloc.get_traced_memory()
+            peak += step_peak - before
+            retained += after - before
+    finally:
+        tracemalloc.stop()
+    return peak / steps, retained / steps
+
+
+@contextlib.contextmanager
+def counting_points(interned: bool = True) -> Iterator[list[int]]:
+    """Count the Points helper.get_point allocates, optionally with interning turned off to compare against"""
+    count = [0]
+    new_point = helper._new_point
+    intern_range = helper.INTERN_MIN, helper.INTERN_MAX
+
+    def counted(cls, xy):
+        count[0] += 1
+        return new_point(cls, xy)
+
+    helper._new_point = counted
+    if not interned:
+        helper.INTERN_MAX = helper.INTERN_MIN
+    try:
+        yield count
+    finally:
+        helper._new_point = new_point
+        helper.INTERN_MIN, helper.INTERN_MAX = intern_range
+
+
+def count_point_allocations(bench: Bench, steps: int, interned: bool = True) -> float:
+    """Mean number of Points allocated by a step"""
+    with counting_points(interned) as count:
+        time_steps(bench, steps, bench.move)
+    return count[0] / steps
+
+
+def run_scenario(size: int, mix_name: str, density: float, steps: int) -> dict:
+    """Benchmark one world. Timings are medians, so the odd slow step (garbage collection etc.) doesn't count."""
+    name = f"bench_{mix_name}_{size}"
+    world_file = make_world_file(size, MIXES[mix_name], density)
+
+    load_times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        load_world(name, world_file)
+        load_times.append(time.perf_counter() - start)
+
+    bench = Bench(name, world_file)
+    n_entities = len(bench.world.entities)
+    move = median(time_steps(bench, steps, bench.move))
+    update, resolve, cull = (median(times) if times else 0.0 for times in time_parts(bench, steps))
+    alloc_peak, alloc_retained = measure_allocations(bench, max(1, steps // 5))
+    # Same steps each time, so the counts with and without interning can be compared.
+    points = Bench(name, world_file), Bench(name, world_file)
+    points_interned = count_point_allocations(points[0], steps)
+    points_uninterned = count_point_allocations(points[1], steps, interned=False)
+
+    return {
+        "size": size,
+        "mix": mix_name,
+        "entities": n_entities,
+        "load_ms": min(load_times) * 1e3,
+        "steps_per_second": 1 / move,
+        "move_ms": move * 1e3,
+        "update_creatures_ms": update * 1e3,
+        "resolve_collisions_ms": resolve * 1e3,
+        "cull_entities_ms": cull * 1e3,
+        "move_us_per_entity": move / n_entities * 1e6,
+        "alloc_peak_kib_per_step": alloc_peak / 1024,
+        "alloc_retained_kib_per_step": alloc_retained / 1024,
+        "points_per_step": points_interned,
+        "points_per_step_uninterned": points_uninterned,
+        # Steps cut short by ENGINE_ERRORS.
+        "engine_errors": bench.errors,
+    }
+
+
+# Metrics where bigger is worse, compared against the baseline.
+COMPARED = (
+    "load_ms",
+    "move_ms",
+    "update_creatures_ms",
+    "resolve_collisions_ms",
+    "cull_entities_ms",
+    "alloc_peak_kib_per_step",
+    "points_per_step",
+)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """List every metric more than tolerance times worse than the baseline"""
+    regressions = []
+    for key, scenario in results["scenarios"].items():
+        if key not in baseline["scenarios"]:
+            continue
+        old = baseline["scenarios"][key]
+        for metric in COMPARED:
+            # Ignore anything too small to time reliably.
+            if old[metric] < 0.01:
+                continue
+            ratio = scenario[metric] / old[metric]
+            if ratio > tolerance:
+                regressions.append(f"{key} {metric}: {old[metric]:.3f} -> {scenario[metric]:.3f} ({ratio:.2f}x)")
+    return regressions
+
+
+def main(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Side lengths of the worlds")
+    parser.add_argument("--mixes", nargs="+", default=list(MIXES), choices=list(MIXES), help="Creature mixes")
+    parser.add_argument("--density", type=float, default=0.05, help="Fraction of tiles with a creature on")
+    parser.add_argument("--steps", type=int, default=50, help="Steps timed per measurement")
+    parser.add_argument("--save", type=Path, help="Save the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Slowdown allowed before failing the compare")
+    options = parser.parse_args(args)
+
+    report_to_stdout(report)
+
+    results: dict = {"python": platform.python_version(), "machine": platform.machine(), "scenarios": {}}
+    report.info(
+        f"{'world':<22}{'entities':>9}{'load ms':>10}{'steps/s':>10}{'update':>9}{'resolve':>9}{'cull':>9}"
+        f"{'points':>9}{'uninterned':>11}"
+    )
+    for size in options.sizes:
+        for mix_name in options.mixes:
+            scenario = run_scenario(size, mix_name, options.density, options.steps)
+            results["scenarios"][f"{mix_name}_{size}"] = scenario
+            report.info(
+                f"{mix_name + ' ' + str(size) + 'x' + str(size):<22}{scenario['entities']:>9}"
+                f"{scenario['load_ms']:>10.1f}{scenario['steps_per_second']:>10.1f}"
+                f"{scenario['update_creatures_ms']:>9.2f}{scenario['resolve_collisions_ms']:>9.2f}"
+                f"{scenario['cull_entities_ms']:>9.2f}{scenario['points_per_step']:>9.1f}"
+                f"{scenario['points_per_step_uninterned']:>11.1f}"
+            )
+            if scenario["engine_errors"]:
+                report.warning(f"{scenario['engine_errors']} steps were cut short by engine errors")
+
+    if options.save:
+        options.save.parent.mkdir(parents=True, exist_ok=True)
+        options.save.write_text(json.dumps(results, indent=2))
+        report.info(f"Saved results to {options.save}")
+
+    if options.compare:
+        regressions = compare(results, json.loads(options.compare.read_text()), options.tolerance)
+        for regression in regressions:
+            report.info(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        report.info(f"No regressions against {options.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -15,6 +15,7 @@ from warnings import warn
 import pygame as pg
 
 # from scripts.entity import Creature, Entity
+from game.world_format import convert
 from gui.asset_loader import get_spritesheet_dims
 
 Config = {
@@ -352,9 +353,10 @@ def clicked_index(click: tuple, campos: list, meta_data: dict) -> tuple:
 
 
 def write_map_pickle(dat: list) -> None:
-    """Save the map file to a pickle."""
+    """Save the map file to a pickle, and the .world file the game loads."""
     with open(f"maps/{FileName}.map", "wb") as file:
         pickle.dump(dat, file)
+    convert(f"maps/{FileName}.map")
 
 
 def apply_selected(cell_list: list, tile: Asset, tile_type: str) -> list: